@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+
+Benchmarks of the pipeline stages on synthetic tables (no EXIOBASE needed):
+
+    python benchmarks/run.py                   # small and medium scales
+    python benchmarks/run.py small ixi pxp     # up to EXIOBASE size
+    python benchmarks/run.py --update-golden   # rewrite the golden outputs
+
+Every scale builds a seeded synthetic table and shock workbook (see
+ts_analysis.synthetic) and runs the shock, footprint, harmonize, classify
+and export stages. The run report of each scale (see ts_analysis.profiling)
+and a summary.csv with one row per scale and stage are written to
+benchmarks/results/<date_time>/. The geo/imp/sec results (the name, name_all
+and name_sum tables of the save_*_res workbooks) of the scales
+with a benchmarks/golden/<scale>/ folder must match the golden CSV files.
+tests/test_original.py checks that the small golden files are the output
+of the row-wise ts_geo/ts_imp/ts_sec of the original script.
+"""
+
+import argparse
+import io
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ts_analysis.pipeline import Pipeline  # noqa: E402
+from ts_analysis.synthetic import synthetic_mrio, synthetic_shock  # noqa: E402
+
+SCALES = {  # regions, sectors
+    'small': (3, 10),
+    'medium': (10, 50),
+    'ixi': (49, 163),
+    'pxp': (49, 200),
+}
+STAGES = ['shock', 'footprint', 'harmonize', 'classify', 'export']
+HERE = Path(__file__).resolve().parent
+
+
+def tables(results):
+    # Sheets of the save_*_res workbooks of every analysis: {sheet: DataFrame}
+    out = {}
+    for name, (_, (ts_results, data, total), _) in results.items():
+        out[name] = ts_results
+        out[name + '_all'] = data
+        out[name + '_sum'] = total.to_frame()
+    return out
+
+
+def compare(results, folder, rtol=1e-9):
+    """Names of the tables that differ from (or are missing in) `folder`."""
+    failed = []
+    for sheet, df in tables(results).items():
+        path = folder / f'{sheet}.csv'
+        if not path.exists():
+            failed.append(sheet)
+            continue
+        # Both sides through CSV, so labels and dtypes are parsed alike
+        expected = pd.read_csv(path)
+        actual = pd.read_csv(io.StringIO(df.to_csv()))
+        try:
+            pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=rtol,
+                                          atol=1e-12)
+        except AssertionError:
+            failed.append(sheet)
+    return failed
+
+
+def run(scale, folder, seed=0, profile=False):
+    regions, sectors = SCALES[scale]
+    database = synthetic_mrio(regions, sectors, seed=seed)
+    pipeline = Pipeline(shock=synthetic_shock(database, folder / 'shock.xlsx'),
+                        norm=folder / 'norm_new.parquet', results=folder / 'results',
+                        cache_dir=folder / 'cache', reports=None, profile=profile)
+    pipeline.results['aggregate'] = database
+    pipeline.run(STAGES)
+    return pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pipeline benchmarks on synthetic tables.')
+    parser.add_argument('scales', nargs='*', metavar='scale',
+                        help='scales to run: ' + ', '.join(SCALES) + ' (default: small medium)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', action='store_true',
+                        help='also trace the allocations of every stage')
+    parser.add_argument('--out', default=HERE / 'results', type=Path)
+    parser.add_argument('--update-golden', action='store_true',
+                        help='write the results as the golden outputs of the scales run')
+    args = parser.parse_args(argv)
+    unknown = [scale for scale in args.scales if scale not in SCALES]
+    if unknown:
+        parser.error('unknown scale(s): ' + ', '.join(unknown))
+
+    out = args.out / datetime.now().strftime('%Y%m%d_%H%M%S')
+    rows = []
+    failures = {}
+    for scale in args.scales or ['small', 'medium']:
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = run(scale, Path(tmp), args.seed, args.profile)
+        pipeline.profiler.write(out / f'{scale}.json', {'scale': scale, 'seed': args.seed})
+        regions, sectors = SCALES[scale]
+        for record in pipeline.profiler.records:
+            rows.append({'scale': scale, 'regions': regions, 'sectors': sectors, **record})
+            print(f"{scale:>8} {record['stage']:>10} {record['self_wall']:10.3f} s "
+                  f"{(record['rss_growth'] or 0) / 2 ** 20:10.1f} MiB")
+
+        golden = HERE / 'golden' / scale
+        results = pipeline.get('classify')
+        if args.update_golden:
+            golden.mkdir(parents=True, exist_ok=True)
+            for sheet, df in tables(results).items():
+                df.to_csv(golden / f'{sheet}.csv')
+        elif golden.exists():
+            failures[scale] = compare(results, golden)
+
+    pd.DataFrame(rows).to_csv(out / 'summary.csv', index=False)
+    print(f'Reports written to {out}')
+    for scale, failed in failures.items():
+        print(f"{scale}: golden outputs {'differ: ' + ', '.join(failed) if failed else 'match'}")
+    return 1 if any(failures.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,10 @@
 This code retrieves emissions extensions from EXIOBASE and converted  
 into GHG emissions in CO2eq using Global Warming Potential values from IPPC-AR6
 
+Every metric of the characterization table (GWP-100/GWP-20/GTP-100 from 
+IPCC AR5 and AR6) is applied in one pass to industry (F) and household (F_Y) 
+emissions
+
 Python version: v3.10.16
 
 EXIOBASE version: v3.9.5 ixi_2020 
@@ -16,42 +20,33 @@ Latest update: March 15, 2025
 """
 
 # Import packages
-import pandas as pd
+import sys
+from pathlib import Path
+from ts_analysis.ghg import (read_stressors, read_characterization, 
+                              characterize, write_extension)
 
 # Import data
     
-exio_path = 'IOT_2020_ixi_v3.9.5' # Add/Change directory for database folder
-
-# Emissions extension
-env_ext = pd.read_csv(exio_path +'/air_emissions/F.txt', sep='\t', index_col=[0], header=[0, 1])  # impacts matrix
-
-# GWP values (IPCC AR6 data in https://zenodo.org/records/6483002)
-gwp_values = {
-    # Carbon Dioxide (CO2)
-    'CO2 - combustion - air': 1,
-    'CO2 - agriculture - peat decay - air': 1,
-    
-    # Methane (CH4)
-    'CH4 - combustion - air': 27,
-    'CH4 - agriculture - air': 27,
-    
-    # Nitrous Oxide (N2O)
-    'N2O - combustion - air': 273,
-    'N2O - agriculture - air': 273,
-    
-    # Sulfur Hexafluoride (SF6)
-    'SF6 - air': 25200,
-    
-    # Hydrofluorocarbons (HFCs)
-    'HFC - air': 1,  # In kg CO2-eq from EXIOBASE
-    
-    # Perfluorocarbons (PFCs)
-    'PFC - air': 1  # In kg CO2-eq from EXIOBASE
-}
-
-    # Filter relevant emissions and apply GWP values
-ghg_emissions = env_ext.loc[env_ext.index.intersection(gwp_values.keys())]  # Select GHGs
-ghg_emissions_gwp = ghg_emissions.mul(pd.Series(gwp_values), axis=0)  # Apply GWP values
-ghg_gwp_sum = ghg_emissions_gwp.sum()
-
-ghg_gwp_sum.to_excel("ghg_emissions_extension.xlsx", index=False)
\ No newline at end of file
+exio_paths = sys.argv[1:] or ['IOT_2020_ixi_v3.9.5'] # Add/Change directories for database folders (one per year)
+
+# Characterization factors: one row per metric, one column per stressor
+# (IPCC AR6 data in https://zenodo.org/records/6483002, and IPCC AR5 WG1 Ch.8)
+    # HFC and PFC are already in kg CO2-eq (GWP-100) in EXIOBASE, 
+    # so they keep a factor of 1 in every metric
+path_factors = 'MARIO_Extensions&Aggregations/characterization_factors.csv'
+factors = read_characterization(path_factors)
+
+for exio_path in exio_paths:
+    # Emissions extensions: only the GHG rows are kept while reading
+    F = read_stressors(exio_path +'/air_emissions/F.txt', factors.columns)  # Industries
+    F_Y = read_stressors(exio_path +'/air_emissions/F_Y.txt', factors.columns)  # Households
+
+    # Apply all metrics with one matrix product
+    ghg_E = characterize(F, factors)
+    ghg_EY = characterize(F_Y, factors)
+
+    if len(exio_paths) == 1:
+        filename = "ghg_emissions_extension.xlsx"
+    else:
+        filename = "ghg_emissions_extension_" + Path(exio_path).name + ".xlsx"
+    write_extension(ghg_E, filename, EY=ghg_EY) # Labeled, ready for exiobase.add_extensions(matrix='E')
\ No newline at end of file
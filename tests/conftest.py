@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Shared fixtures: a small seeded synthetic table and its shock workbook."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ts_analysis import shocks  # noqa: E402
+from ts_analysis.synthetic import synthetic_mrio, synthetic_shock  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def database():
+    return synthetic_mrio(3, 10, seed=2)
+
+
+@pytest.fixture(scope='session')
+def shock_path(database, tmp_path_factory):
+    return synthetic_shock(database, tmp_path_factory.mktemp('shock') / 'shock.xlsx')
+
+
+@pytest.fixture
+def shock(shock_path):
+    return shocks.read_shock(shock_path)
+
+
+@pytest.fixture(scope='session')
+def footprint(database, shock_path):
+    from ts_analysis import footprints
+    from ts_analysis.harmonize import INDICATORS
+    from ts_analysis.incremental import IncrementalSolver
+    from ts_analysis.solver import LeontiefSolver
+
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X,
+                                  shocks.read_shock(shock_path))
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = LeontiefSolver(database.z)
+    return footprints.batched_footprints(
+        M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+        {'baseline': database.Y, 'CE scenario': Y_ce}, ['EU', 'LAC'])
+
+
+@pytest.fixture(scope='session')
+def norm_new(footprint):
+    from ts_analysis.harmonize import harmonize
+
+    return harmonize(footprint, regions=['EU', 'LAC'])
+
+
+@pytest.fixture(scope='session')
+def regional_norm(tmp_path_factory):
+    # norm_new of every region of a 5-region table (EU, RoW, LAC, R04, R05:
+    # the row order is not alphabetical)
+    from ts_analysis import footprints
+    from ts_analysis.harmonize import INDICATORS, harmonize
+    from ts_analysis.incremental import IncrementalSolver
+    from ts_analysis.solver import LeontiefSolver
+
+    database = synthetic_mrio(5, 10, seed=4)
+    shock = shocks.read_shock(
+        synthetic_shock(database, tmp_path_factory.mktemp('shock') / 'shock.xlsx'))
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = LeontiefSolver(database.z)
+    regions = list(database.Y.columns.unique(level=0))
+    fp = footprints.batched_footprints(
+        M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+        {'baseline': database.Y, 'CE scenario': Y_ce}, regions)
+    return harmonize(fp, regions=regions)
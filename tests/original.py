@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Row-wise reference implementation: the harmonization (Step 2) and the
+ts_geo/ts_imp/ts_sec functions of the original ts_analysis_v3.0.py, with
+the plotting removed and the footprints of Step 1 written for any table.
+The package results are checked against these.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def harmonize(Y_bau, L_bau, Y_ce, L_ce, v, e):
+    va = v.loc['Value Added', :]
+    emp = e.loc['Employment (people)', :]
+    ghg = e.loc['GHG emissions', :]
+
+    va_bau = np.diag(va) @ L_bau
+    emp_bau = np.diag(emp) @ L_bau
+    ghg_bau = np.diag(ghg) @ L_bau
+
+    va_ce = np.diag(va) @ L_ce
+    emp_ce = np.diag(emp) @ L_ce
+    ghg_ce = np.diag(ghg) @ L_ce
+
+    norm = []
+    for region in ['EU', 'LAC']:
+        bau = pd.DataFrame({
+            'Value Added': (va_bau @ Y_bau.loc[:, region]).values.ravel(),
+            'Employment': (emp_bau @ Y_bau.loc[:, region]).values.ravel(),
+            'GHG': (ghg_bau @ Y_bau.loc[:, region]).values.ravel()})
+        ce = pd.DataFrame({
+            'Value Added': (va_ce @ Y_ce.loc[:, region]).values.ravel(),
+            'Employment': (emp_ce @ Y_ce.loc[:, region]).values.ravel(),
+            'GHG': (ghg_ce @ Y_ce.loc[:, region]).values.ravel()})
+        norm_ = ((ce - bau) / bau.sum()) * 100
+        norm_ = norm_.fillna(0) # Replace resulting NaN values with zeros in Norm
+        norm_.index = Y_bau.index
+        # Changes in sign for environmental impacts
+        norm_.loc[:,'GHG']*= -1
+
+        norm_agg = norm_.groupby(level='Item').sum()
+        norm_agg['Region'] = region + ' footprint'  # Add as a column
+        norm_agg = norm_agg.set_index('Region', append=True)  # Move to MultiIndex
+        norm_agg = norm_agg.reorder_levels(['Region', 'Item'])  # Optional: reorder levels
+        norm.append(norm_agg)
+    return pd.concat(norm)
+
+
+def ts_geo(data, country_list, impact):
+    df_ = data.copy()
+    df_geo = df_.loc[pd.IndexSlice[country_list,:],impact]
+    # Group by country and sector, then unstack for plotting
+    grouped = df_geo.unstack(level='Region')
+    df_ts = grouped.copy()
+    # Function to apply win/lose/tie situation
+    def ts_result(value1, value2):
+        if value1 > 0 and value2 > 0:
+            return 'win-win'
+        elif value1 > 0 and value2 < 0:
+            return 'win-lose'
+        elif value1 < 0 and value2 > 0:
+            return 'lose-win'
+        elif value1 < 0 and value2 < 0:
+            return 'lose-lose'
+        elif value1 == 0 and value2 == 0:
+            return 'tie-tie'
+        elif value1 == 0 and value2 < 0:
+            return 'tie-lose'
+        elif value1 == 0 and value2 > 0:
+            return 'tie-win'
+        elif value1 < 0 and value2 == 0:
+            return 'lose-tie'
+        elif value1 > 0 and value2 == 0:
+            return 'win-tie'
+        else:
+            return
+
+    # Apply the function to create a new TS column
+    df_ts['TS'] = df_ts.apply(lambda row: ts_result(row[df_ts.columns[0]],
+                                                        row[df_ts.columns[1]]),
+                                                    axis=1)
+    # Create TS-results dataframe
+    ## Function to calculate Euclidean sum
+    def euclidean_sum(row):
+        return np.sqrt(row[df_ts.columns[0]] ** 2 + row[df_ts.columns[1]] ** 2)
+    ## Calculate Euclidean sum for each row
+    df_ts['Euclidean'] = df_ts.apply(euclidean_sum, axis=1)
+    ## New dataframe
+    categories = df_ts['TS'].unique() # Extract unique categories
+    results = df_ts['TS'].value_counts().reindex(categories, fill_value=0).tolist() # Count occurrences of each category
+    ### Calculate magnitude for each category
+    magnitude = []
+    for category in categories:
+        # Filter DataFrame for the current category and sum the Euclidean distances
+        magnitude.append(df_ts[df_ts['TS'] == category]['Euclidean'].sum())
+
+    ts_results = pd.DataFrame({'Categories': categories,
+                               'Results': results,
+                               'Magnitude': magnitude}) # Create DataFrame with correct values for each category
+
+    total = df_geo.groupby('Region').sum()
+    return ts_results, grouped, total
+
+
+def ts_imp(data, impact_list, country):
+    df_ = data.copy()
+    df_imp = df_.loc[pd.IndexSlice[country,:],impact_list]
+    df_ts = df_imp.copy()
+
+    # Function to apply win/lose/tie situation
+    def ts_result(value1, value2, value3):
+        if value1 > 0 and value2 > 0 and value3 > 0:
+            return 'win-win-win'
+        elif value1 < 0 and value2 < 0 and value3 < 0:
+            return 'lose-lose-lose'
+        elif value1 == 0 and value2 == 0 and value3 == 0:
+            return 'tie-tie-tie'
+        ###
+        elif value1 > 0 and value2 > 0 and value3 < 0:
+            return 'win-win-lose'
+        elif value1 > 0 and value2 < 0 and value3 < 0:
+            return 'win-lose-lose'
+        elif value1 > 0 and value2 < 0 and value3 > 0:
+            return 'win-lose-win'
+        elif value1 > 0 and value2 == 0 and value3 == 0:
+            return 'win-tie-tie'
+        elif value1 > 0 and value2 < 0 and value3 < 0:
+            return 'win-lose-lose'
+        elif value1 > 0 and value2 == 0 and value3 < 0:
+            return 'win-tie-lose'
+        elif value1 > 0 and value2 == 0 and value3 > 0:
+            return 'win-tie-win'
+        elif value1 > 0 and value2 > 0 and value3 == 0:
+            return 'win-win-tie'
+        elif value1 > 0 and value2 < 0 and value3 == 0:
+            return 'win-lose-tie'
+        ###
+        elif value1 < 0 and value2 > 0 and value3 > 0:
+            return 'lose-win-win'
+        elif value1 < 0 and value2 > 0 and value3 < 0:
+            return 'lose-win-lose'
+        elif value1 < 0 and value2 < 0 and value3 > 0:
+            return 'lose-lose-win'
+        elif value1 < 0 and value2 == 0 and value3 < 0:
+            return 'lose-tie-lose'
+        elif value1 < 0 and value2 == 0 and value3 < 0:
+            return 'lose-tie-lose'
+        elif value1 < 0 and value2 == 0 and value3 > 0:
+            return 'lose-tie-win'
+        elif value1 < 0 and value2 > 0 and value3 == 0:
+            return 'lose-win-tie'
+        elif value1 < 0 and value2 < 0 and value3 == 0:
+            return 'lose-lose-tie'
+        ###
+        elif value1 == 0 and value2 > 0 and value3 == 0:
+            return 'tie-win-tie'
+        elif value1 == 0 and value2 > 0 and value3 < 0:
+            return 'tie-win-lose'
+        elif value1 == 0 and value2 > 0 and value3 > 0:
+            return 'tie-win-win'
+        elif value1 > 0 and value2 > 0 and value3 == 0:
+            return 'win-win-tie'
+        elif value1 < 0 and value2 > 0 and value3 < 0:
+            return 'lose-win-lose'
+        ###
+        elif value1 == 0 and value2 < 0 and value3 == 0:
+            return 'tie-lose-tie'
+        elif value1 == 0 and value2 < 0 and value3 < 0:
+            return 'tie-lose-lose'
+        elif value1 == 0 and value2 < 0 and value3 > 0:
+            return 'tie-lose-win'
+        ###
+        elif value1 == 0 and value2 == 0 and value3 > 0:
+            return 'tie-tie-win'
+        elif value1 == 0 and value2 == 0 and value3 < 0:
+            return 'tie-tie-lose'
+        else:
+            return
+
+    # Apply the function to create a new TS column
+    df_ts['TS'] = df_ts.apply(lambda row: ts_result(row[df_ts.columns[0]],
+                                                    row[df_ts.columns[1]],
+                                                    row[df_ts.columns[2]]),
+                                                        axis=1)
+    # Create TS-results dataframe
+    ## Function to calculate Euclidean sum
+    def euclidean_sum(row):
+        return np.sqrt(row[df_ts.columns[0]] ** 2 + row[df_ts.columns[1]] ** 2 + row[df_ts.columns[2]] ** 2)
+
+    ## Calculate Euclidean sum for each row
+    df_ts['Euclidean'] = df_ts.apply(euclidean_sum, axis=1)
+
+    ## New dataframe
+    categories = df_ts['TS'].unique() # Extract unique categories
+    results = df_ts['TS'].value_counts().reindex(categories, fill_value=0).tolist() # Count occurrences of each category
+
+    ### Calculate magnitude for each category
+    magnitude = []
+    for category in categories:
+        # Filter DataFrame for the current category and sum the Euclidean distances
+        magnitude.append(df_ts[df_ts['TS'] == category]['Euclidean'].sum())
+
+    ts_results = pd.DataFrame({'Categories': categories,
+                               'Results': results,
+                               'Magnitude': magnitude}) # Create DataFrame with correct values for each category
+
+    total = df_imp.sum()
+    return ts_results, df_imp, total
+
+
+def ts_sec(data, sector_list, impact):
+    df_ = data.copy()
+    df_sec = df_.loc[pd.IndexSlice[:, sector_list],impact]
+
+    # Group by country and sector, then unstack for plotting
+    grouped = df_sec.unstack(level='Item')
+    df_ts = grouped.copy()
+
+    # Function to apply win/lose/tie situation
+    def ts_result(value1, value2):
+        if value1 > 0 and value2 > 0:
+            return 'win-win'
+        elif value1 > 0 and value2 < 0:
+            return 'win-lose'
+        elif value1 < 0 and value2 > 0:
+            return 'lose-win'
+        elif value1 < 0 and value2 < 0:
+            return 'lose-lose'
+        elif value1 == 0 and value2 == 0:
+            return 'tie-tie'
+        elif value1 == 0 and value2 < 0:
+            return 'tie-lose'
+        elif value1 == 0 and value2 > 0:
+            return 'tie-win'
+        elif value1 < 0 and value2 == 0:
+            return 'lose-tie'
+        elif value1 > 0 and value2 == 0:
+            return 'win-tie'
+        else:
+            return 'tie-tie'
+
+    # Apply the function to create a new TS column
+    df_ts['TS'] = df_ts.apply(lambda row: ts_result(row[df_ts.columns[0]],
+                                                        row[df_ts.columns[1]]),
+                                                    axis=1)
+    # Create TS-results dataframe
+    ## Function to calculate Euclidean sum
+    def euclidean_sum(row):
+        return np.sqrt(row[df_ts.columns[0]] ** 2 + row[df_ts.columns[1]] ** 2)
+
+    ## Calculate Euclidean sum for each row
+    df_ts['Euclidean'] = df_ts.apply(euclidean_sum, axis=1)
+
+    ## New dataframe
+    categories = df_ts['TS'].unique() # Extract unique categories
+    results = df_ts['TS'].value_counts().reindex(categories, fill_value=0).tolist() # Count occurrences of each category
+
+    ### Calculate magnitude for each category
+    magnitude = []
+    for category in categories:
+        # Filter DataFrame for the current category and sum the Euclidean distances
+        magnitude.append(df_ts[df_ts['TS'] == category]['Euclidean'].sum())
+
+    ts_results = pd.DataFrame({'Categories': categories,
+                               'Results': results,
+                               'Magnitude': magnitude}) # Create DataFrame with correct values for each category
+
+    total = df_sec.groupby('Item').sum()
+    return ts_results, grouped, total
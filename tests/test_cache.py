@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis import cache
+
+
+def test_matrices_round_trip(database, tmp_path):
+    matrices = {name: getattr(database, name) for name in ['z', 'Y', 'X', 'v', 'e']}
+    units = {'Sector': pd.DataFrame({'unit': ['M EUR']}, index=['Agriculture'])}
+    cache.save_matrices(matrices, units, tmp_path / 'entry')
+    loaded, loaded_units = cache.load_matrices(tmp_path / 'entry')
+    for name, df in matrices.items():
+        pd.testing.assert_frame_equal(loaded[name], df, check_index_type=False,
+                                      check_column_type=False)
+    assert loaded_units['Sector'].loc['Agriculture', 'unit'] == 'M EUR'
+
+
+def test_database_key_includes_settings(database, tmp_path):
+    # A different aggregation setting must not return the cached database
+    inputs = [tmp_path / 'input.txt']
+    inputs[0].write_text('database')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return SimpleNamespace(units={}, **{name: getattr(database, name)
+                                            for name in cache.MATRICES})
+
+    for levels in [['Region', 'Sector'], ['Region']]:
+        cache.cached_database(build, inputs, tmp_path / 'cache', extra={'levels': levels})
+    assert len(builds) == 2
+    assert cache.cache_key(inputs, {'levels': ['Region']}) != cache.cache_key(inputs)
+
+
+def test_scenario_cache_evicts_least_recently_used(tmp_path):
+    store = cache.ScenarioCache(tmp_path, max_bytes=40000)
+    matrices = {'w': pd.DataFrame(np.ones((40, 40)))}  # About 13 kB per entry
+    for key in ['a', 'b', 'c']:
+        store.put(key, matrices)
+        os.utime(tmp_path / key, (time.time() - 10 + len(os.listdir(tmp_path)),) * 2)
+    assert store.get('a') is not None  # Now the most recently used
+    store.put('d', matrices)
+    assert [key for key, _, _ in store.entries()] == ['c', 'a', 'd']
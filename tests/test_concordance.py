@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from ts_analysis.concordance import LEVELS, Concordance, cached_concordance
+
+
+def write_workbook(database, path):
+    # EU and LAC kept, every other region into RoW; two sectors merged
+    regions = database.z.index.unique(level='Region')
+    sectors = database.z.index.unique(level='Item')
+    mappings = {
+        'Region': pd.Series({r: r if r in ['EU', 'LAC'] else 'RoW' for r in regions}),
+        'Sector': pd.Series({s: 'Fertilisers' if s in ['P&N Fertilisers', 'Organic composting']
+                             else s for s in sectors}),
+        'Factor of production': pd.Series({f: 'Value Added' for f in database.v.index}),
+        'Satellite account': pd.Series({e: e for e in database.e.index}),
+        'Consumption category': pd.Series({'Final demand': 'Final demand'}),
+    }
+    with pd.ExcelWriter(path) as writer:
+        for level in LEVELS:
+            mappings[level].rename('Aggregation').to_frame().to_excel(writer, sheet_name=level)
+    return path
+
+
+def flows(database):
+    return {'Z': database.Z, 'Y': database.Y, 'V': database.V, 'E': database.E,
+            'EY': database.EY}
+
+
+def test_aggregation_matches_groupby(database, tmp_path):
+    concordance = cached_concordance(write_workbook(database, tmp_path / 'aggr.xlsx'),
+                                     cache_dir=tmp_path)
+    out = concordance.aggregate(flows(database))
+
+    sector = {'P&N Fertilisers': 'Fertilisers', 'Organic composting': 'Fertilisers'}
+    labels = database.Z.index.map(lambda i: (i[0], i[1], sector.get(i[2], i[2])))
+    expected = database.Z.groupby(labels, sort=False).sum().T.groupby(labels, sort=False).sum().T
+    np.testing.assert_allclose(out['Z'].loc[expected.index, expected.columns], expected)
+    np.testing.assert_allclose(out['X']['production'].sum(), database.X['production'].sum())
+
+
+def test_cache_round_trip(database, tmp_path):
+    path = write_workbook(database, tmp_path / 'aggr.xlsx')
+    concordance = cached_concordance(path, cache_dir=tmp_path)
+    expected = concordance.aggregate(flows(database))
+    concordance.save()
+    folder = concordance.folder
+    assert not list(folder.glob('*.tmp*'))
+
+    cached = cached_concordance(path, cache_dir=tmp_path)
+    assert cached._compiled.keys() == concordance._compiled.keys()
+    for name, df in cached.aggregate(flows(database)).items():
+        pd.testing.assert_frame_equal(df, expected[name])
+
+    # Saving again (e.g. another worker) keeps the entry complete
+    cached.save()
+    assert Concordance.load(folder)._compiled.keys() == concordance._compiled.keys()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_analysis import dimensions
+from ts_analysis.cube import ResultCube
+
+CASES = [
+    (dimensions.geo, ['LAC footprint', 'EU footprint'], 'GHG'),
+    (dimensions.imp, ['GHG', 'Value Added', 'Employment'], 'LAC footprint'),
+    (dimensions.sec, ['P&N Fertilisers', 'Agriculture'], 'Value Added'),
+]
+
+
+@pytest.mark.parametrize('function, selection, label', CASES)
+def test_cube_matches_frame(norm_new, function, selection, label):
+    # Both inputs give the same tables, in the same row and column order
+    expected = function(norm_new, selection, label)
+    actual = function(ResultCube.from_frame(norm_new, 'CE scenario'), selection, label)
+    pd.testing.assert_frame_equal(actual[0], expected[0])
+    pd.testing.assert_frame_equal(actual[1], expected[1], check_names=False)
+    pd.testing.assert_series_equal(actual[2], expected[2], check_names=False)
+
+
+REGIONAL_CASES = [
+    (dimensions.geo, ['RoW footprint', 'LAC footprint'], 'GHG'),
+    (dimensions.geo, ['R05 footprint', 'EU footprint', 'LAC footprint'], 'Value Added'),
+    (dimensions.imp, ['GHG', 'Employment'], 'R04 footprint'),
+    (dimensions.sec, ['Mining', 'Agriculture', 'Electricity'], 'GHG'),
+]
+
+
+@pytest.mark.parametrize('function, selection, label', REGIONAL_CASES)
+def test_cube_matches_frame_in_selection_order(regional_norm, function, selection, label):
+    expected = function(regional_norm, selection, label)
+    actual = function(ResultCube.from_frame(regional_norm), selection, label)
+    pd.testing.assert_frame_equal(actual[0], expected[0])
+    pd.testing.assert_frame_equal(actual[1], expected[1], check_names=False)
+    pd.testing.assert_series_equal(actual[2], expected[2], check_names=False)
+    if function is dimensions.geo:
+        # Regions (and so the win-lose / lose-win labels) in the caller's order
+        assert list(actual[1].columns) == selection
+
+
+def test_cube_round_trip(regional_norm):
+    pd.testing.assert_frame_equal(ResultCube.from_frame(regional_norm).to_frame(),
+                                  regional_norm, check_names=False)
+
+
+@pytest.mark.parametrize('cube', [False, True])
+def test_geo_pairs_match_geo(regional_norm, cube):
+    data = ResultCube.from_frame(regional_norm) if cube else regional_norm
+    regions = ['RoW footprint', 'LAC footprint', 'EU footprint', 'R05 footprint']
+    impacts = ['GHG', 'Value Added']
+    pairs = dimensions.geo_pairs(data, impacts, regions)
+    assert len(pairs) == len(impacts) * len(regions) ** 2
+    for impact in impacts:
+        for a in regions:
+            for b in regions:
+                if a == b:
+                    continue
+                ts_results = dimensions.geo(data, [a, b], impact)[0] \
+                    .set_index('Categories')
+                row = pairs.loc[(impact, a, b)]
+                found = row['Results'] > 0
+                assert sorted(found[found].index) == sorted(ts_results.index)
+                assert (row['Results'][ts_results.index] == ts_results['Results']).all()
+                np.testing.assert_allclose(row['Magnitude'][ts_results.index],
+                                           ts_results['Magnitude'], rtol=1e-12)
+                assert (row['Magnitude'][~found] == 0).all()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_analysis import footprints, shocks
+from ts_analysis.harmonize import INDICATORS
+from ts_analysis.incremental import IncrementalSolver
+from ts_analysis.pipeline import Pipeline
+from ts_analysis.solver import LeontiefSolver
+
+REGIONS = ['EU', 'LAC']
+
+
+@pytest.fixture
+def systems(database, shock):
+    # Solvers and written inverses of the baseline and the scenario
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    L = LeontiefSolver(database.z)
+    solvers = {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)}
+    return solvers, {'baseline': database.Y, 'CE scenario': Y_ce}
+
+
+@pytest.mark.parametrize('block', [1, 7, 64])
+def test_write_inverse(database, tmp_path, block):
+    L = footprints.write_inverse(LeontiefSolver(database.z), tmp_path / 'L.npy', block=block)
+    assert L.flags.f_contiguous
+    np.testing.assert_allclose(L, database.w.to_numpy(), rtol=1e-10, atol=1e-14)
+
+
+def test_chunked_matches_batched(database, systems, tmp_path):
+    solvers, Y = systems
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = {scenario: footprints.write_inverse(solver, tmp_path / f'{i}.npy')
+         for i, (scenario, solver) in enumerate(solvers.items())}
+    expected = footprints.batched_footprints(M, solvers, Y, REGIONS)
+    # A budget of a few columns per block
+    actual, report = footprints.chunked_footprints(M, L, Y, REGIONS, database.z.index,
+                                                   memory=4 * 16 * len(database.z))
+    pd.testing.assert_frame_equal(actual, expected, rtol=1e-10)
+    assert report == {'dtype': 'float64', 'bound': None, 'error': None}
+
+
+def test_float32_within_its_bound(database, systems, tmp_path):
+    solvers, Y = systems
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = {scenario: footprints.write_inverse(solver, tmp_path / f'{i}.npy', np.float32)
+         for i, (scenario, solver) in enumerate(solvers.items())}
+    expected = footprints.batched_footprints(M, solvers, Y, REGIONS)
+    n = len(database.z)
+    actual, report = footprints.chunked_footprints(M, L, Y, REGIONS, database.z.index,
+                                                   memory=8 * n, dtype=np.float32, check=n)
+    assert report['dtype'] == 'float32'
+    exact = expected.to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.nan_to_num(np.abs(actual.to_numpy() - exact) / np.abs(exact))
+    assert 0 < relative.max() <= report['bound']
+    # The sampled rows (all of them here) against float64 of the float32 inverse
+    assert report['error'] <= report['bound']
+
+
+@pytest.mark.parametrize('dtype', ['float64', 'float32'])
+def test_low_memory_pipeline(database, shock_path, norm_new, tmp_path, dtype):
+    p = Pipeline(shock=shock_path, norm=None, cache_dir=tmp_path, reports=None,
+                 memory=16 * 8 * len(database.z), dtype=dtype)
+    p.results['aggregate'] = database
+    # float32 errors are relative to the footprints, not to their changes (%)
+    atol = 1e-9 if dtype == 'float64' else 1e-4
+    pd.testing.assert_frame_equal(p.get('harmonize'), norm_new, rtol=1e-9, atol=atol)
+    assert (p.precision['bound'] is None) == (dtype == 'float64')
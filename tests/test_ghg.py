@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from ts_analysis import ghg
+
+GHG = ['CO2 - combustion - air', 'CH4 - combustion - air', 'N2O - combustion - air',
+       'SF6 - air']
+# Stressor rows of F.txt: two regions × two sectors
+ROWS = {
+    'CO2 - combustion - air': [10.0, 20.0, 30.0, 40.0],
+    'CO2 - combustion - air - biogenic': [1e6, 1e6, 1e6, 1e6],  # Longer name
+    'CH4 - combustion': [1e6, 1e6, 1e6, 1e6],  # Shorter name
+    'CH4 - combustion - air': [1.0, 0.0, 2.0, 0.5],
+    'N2O - combustion - air': [0.1, 0.2, 0.0, 0.0],
+    'Nitrogen - air': [1e6, 1e6, 1e6, 1e6],
+    'SF6 - air': [0.0, 0.0, 0.001, 0.0],
+    'CH4 - combustion - air (kg)': [1e6, 1e6, 1e6, 1e6],  # Same prefix
+}
+
+
+def write_stressors(path):
+    with open(path, 'w') as f:
+        f.write('region\tAT\tAT\tBE\tBE\n')
+        f.write('stressor\tCrops\tCattle\tCrops\tCattle\n')
+        for name, values in ROWS.items():
+            f.write('\t'.join([name] + [str(value) for value in values]) + '\n')
+    return path
+
+
+def test_read_stressors_keeps_exact_rows(tmp_path):
+    F = ghg.read_stressors(write_stressors(tmp_path / 'F.txt'), GHG)
+    assert list(F.index) == GHG
+    assert list(F.columns) == [('AT', 'Crops'), ('AT', 'Cattle'), ('BE', 'Crops'),
+                               ('BE', 'Cattle')]
+    pd.testing.assert_frame_equal(
+        F, pd.DataFrame([ROWS[name] for name in GHG], index=F.index, columns=F.columns))
+
+
+def test_read_stressors_in_small_chunks(tmp_path):
+    # The read buffer never splits a row
+    path = write_stressors(tmp_path / 'F.txt')
+    pd.testing.assert_frame_equal(ghg.read_stressors(path, GHG, chunk=16),
+                                  ghg.read_stressors(path, GHG))
+
+
+def test_characterize_worked_sum(tmp_path):
+    pd.DataFrame({'CO2 - combustion - air': [1, 1], 'CH4 - combustion - air': [27, 28],
+                  'N2O - combustion - air': [273, 265], 'SF6 - air': [25200, 23500],
+                  'HFC - air': [1, 1]},  # Not in F: counts as zero
+                 index=pd.Index(['GWP100 AR6', 'GWP100 AR5'], name='metric')
+                 ).to_csv(tmp_path / 'factors.csv')
+    Q = ghg.read_characterization(tmp_path / 'factors.csv')
+    F = ghg.read_stressors(write_stressors(tmp_path / 'F.txt'), Q.columns)
+    E = ghg.characterize(F, Q)
+    # e.g. BE Crops in AR6: 30 + 27 * 2 + 273 * 0 + 25200 * 0.001
+    expected = pd.DataFrame([[64.3, 74.6, 109.2, 53.5], [64.5, 73.0, 109.5, 54.0]],
+                            index=Q.index, columns=F.columns)
+    pd.testing.assert_frame_equal(E, expected, rtol=1e-12)
+
+
+def test_write_extension(tmp_path):
+    F = ghg.read_stressors(write_stressors(tmp_path / 'F.txt'), GHG)
+    E = ghg.characterize(F, pd.DataFrame([[1, 27, 273, 25200]], index=['GHG emissions'],
+                                         columns=GHG))
+    EY = E * 0.5
+    ghg.write_extension(E, tmp_path / 'extension.xlsx', EY=EY)
+    sheets = pd.read_excel(tmp_path / 'extension.xlsx', sheet_name=None, index_col=0,
+                           header=None)
+    assert list(sheets) == ['E', 'EY', 'units']
+    for name, level, values in [('E', 'Sector', E), ('EY', 'Consumption category', EY)]:
+        sheet = sheets[name]
+        assert sheet.iloc[:3].T.values.tolist() == [[region, level, item]
+                                                    for region, item in F.columns]
+        assert list(sheet.index[3:]) == ['GHG emissions']
+        assert sheet.iloc[3:].astype(float).values.tolist() == values.values.tolist()
+    assert sheets['units'].loc['GHG emissions', 1] == 'kg CO2 eq.'
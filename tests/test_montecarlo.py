@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_analysis import dimensions, footprints, montecarlo
+from ts_analysis.classify import ts_classify
+from ts_analysis.harmonize import INDICATORS
+
+REGIONS = ['EU', 'LAC']
+ANALYSES = {
+    'geo_gwp': ('geo', ['LAC footprint', 'EU footprint'], 'GHG'),
+    'imp_eu': ('imp', ['Value Added', 'Employment', 'GHG'], 'EU footprint'),
+    'sec_va': ('sec', ['P&N Fertilisers', 'Agriculture'], 'Value Added'),
+}
+
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    draws = rng.normal(3, 2, (103, 4, 2))
+    stats = montecarlo.RunningStats()
+    for start in range(0, len(draws), 25):
+        stats.update(draws[start:start + 25])
+    assert stats.n == len(draws)
+    np.testing.assert_allclose(stats.mean, draws.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(stats.std, draws.std(axis=0, ddof=1), rtol=1e-12)
+
+
+def test_reservoir_keeps_a_short_stream():
+    draws = np.arange(30, dtype=float)[:, None]
+    sample = montecarlo.Reservoir(50, np.random.default_rng(0))
+    for start in range(0, 30, 7):
+        sample.update(draws[start:start + 7])
+    np.testing.assert_allclose(sample.quantiles([0, 0.5, 1])[:, 0], [0, 14.5, 29])
+
+
+def test_without_noise_draws_equal_harmonize(database, shock, norm_new):
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    result = montecarlo.monte_carlo(
+        database.w, database.z, database.Y, database.X, M, shock, ANALYSES, draws=7,
+        regions=REGIONS, shock_sd=0, intensity_sd=0, batch=3, seed=0)
+    expected = norm_new.reindex(result['mean'].index)
+    pd.testing.assert_frame_equal(result['mean'], expected, check_names=False,
+                                  check_index_type=False, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(result['std'].to_numpy(), 0, atol=1e-8)
+    for q in result['quantiles'].values():
+        pd.testing.assert_frame_equal(q, result['mean'], rtol=1e-8, atol=1e-10)
+
+    # Every row falls in the category of the exact analysis, in the same order
+    for name, (dimension, selection, label) in ANALYSES.items():
+        _, grouped, _ = getattr(dimensions, dimension)(norm_new, selection, label)
+        rows = ts_classify(grouped)[1]
+        if dimension == 'imp':
+            rows.index = rows.index.droplevel('Region')
+        probabilities = result['probabilities'][name]
+        assert (probabilities.to_numpy() == 1).sum(axis=1).tolist() == [1] * len(probabilities)
+        assert (probabilities.idxmax(axis=1) == rows['TS'].reindex(probabilities.index)).all()
+
+
+@pytest.mark.parametrize('intensity_sd', [0.0, 0.05])
+def test_noise_spreads_the_draws(database, shock, intensity_sd):
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    result = montecarlo.monte_carlo(
+        database.w, database.z, database.Y, database.X, M, shock, ANALYSES, draws=200,
+        regions=REGIONS, shock_sd=0.1, intensity_sd=intensity_sd, seed=0)
+    assert (result['std'].to_numpy() >= 0).all() and result['std'].to_numpy().max() > 0
+    for probabilities in result['probabilities'].values():
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1)
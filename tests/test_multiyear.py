@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_analysis import ghg, multiyear
+from ts_analysis.pipeline import DEFAULTS, Pipeline
+from ts_analysis.synthetic import synthetic_mrio, synthetic_shock
+
+YEARS = [2015, 2020]
+FACTORS = pd.DataFrame(
+    {'CO2 - combustion - air': [1.0, 1.0], 'CH4 - combustion - air': [27.0, 28.0],
+     'N2O - combustion - air': [273.0, 265.0]},
+    index=pd.Index(['GWP100 AR6', 'GWP100 AR5'], name='metric'))
+
+
+def year_database(year):
+    return synthetic_mrio(3, 10, seed=year)
+
+
+def write_stressors(path, database, seed):
+    # F.txt of the table: GHG rows among other stressors
+    columns = [(region, item) for region, _, item in database.z.columns]
+    rng = np.random.default_rng(seed)
+    rows = list(FACTORS.columns) + ['Nitrogen - air', 'CO2 - waste - air']
+    path.parent.mkdir(parents=True)
+    with open(path, 'w') as f:
+        f.write('\t'.join(['region'] + [region for region, _ in columns]) + '\n')
+        f.write('\t'.join(['stressor'] + [item for _, item in columns]) + '\n')
+        for row in rows:
+            f.write('\t'.join([row] + [str(x) for x in rng.random(len(columns))]) + '\n')
+
+
+@pytest.fixture
+def config(tmp_path):
+    for year in YEARS:
+        write_stressors(tmp_path / f'IOT_{year}' / 'air_emissions' / 'F.txt',
+                        year_database(year), year)
+    FACTORS.to_csv(tmp_path / 'factors.csv')
+    (tmp_path / 'aggregation.xlsx').write_text('aggregation')
+    return {**DEFAULTS, 'path_template': str(tmp_path / 'IOT_{year}'),
+            'factors': tmp_path / 'factors.csv', 'path_aggr': tmp_path / 'aggregation.xlsx',
+            'shock': synthetic_shock(year_database(YEARS[0]), tmp_path / 'shock.xlsx'),
+            'cache_dir': tmp_path / 'cache', 'results': tmp_path / 'results'}
+
+
+def test_ghg_extension_keyed_on_stressors_and_factors(config):
+    def extension(year, **settings):
+        path_exio = config['path_template'].format(year=year)
+        return multiyear.ghg_extension({**config, 'path_exio': path_exio, **settings}, year)
+
+    path = extension(2015)
+    E = pd.read_excel(path, sheet_name='E', index_col=0, header=[0, 1, 2])
+    F = ghg.read_stressors(config['path_template'].format(year=2015)
+                           + '/air_emissions/F.txt', FACTORS.columns)
+    np.testing.assert_allclose(E.to_numpy()[0], FACTORS.iloc[0] @ F)
+    assert extension(2015) == path
+
+    factors = FACTORS.copy()
+    factors.loc['GWP100 AR6', 'CH4 - combustion - air'] = 29.8
+    factors.to_csv(config['factors'])
+    assert extension(2015) != path
+    assert extension(2015, ghg_metric='GWP100 AR5') != path
+    # Another F.txt
+    assert extension(2015, path_exio=config['path_template'].format(year=2020)) != path
+
+
+def test_years_in_process(config, tmp_path, monkeypatch):
+    # Every year on its own synthetic table, as its aggregate stage would give
+    def aggregate(self):
+        year = int(self.config['path_exio'].rsplit('_', 1)[-1])
+        return year_database(year)
+
+    monkeypatch.setattr(Pipeline, '_aggregate', aggregate)
+    paths = multiyear.run(config, YEARS, tmp_path / 'years', processes=1)
+    assert len(paths) == 2 * len(YEARS)
+    norm_new = multiyear.read_years(tmp_path / 'years')
+    assert sorted(norm_new.index.unique(level='Year')) == YEARS
+    for year in YEARS:
+        p = Pipeline(shock=config['shock'], norm=None, reports=None)
+        p.results['aggregate'] = year_database(year)
+        pd.testing.assert_frame_equal(norm_new.loc[year], p.get('harmonize'),
+                                      check_index_type=False, check_column_type=False)
+
+    summary = multiyear.read_years(tmp_path / 'years', 'classification')
+    assert set(summary.index.unique(level='Year')) == set(YEARS)
+    assert {'Categories', 'Results', 'Magnitude'} <= set(summary.columns)
+    # The extension of every year is cached once
+    assert len(list((tmp_path / 'cache' / 'extensions').glob('*.xlsx'))) == len(YEARS)
+
+
+def test_workers():
+    assert multiyear.workers(YEARS, processes=8) == len(YEARS)
+    assert multiyear.workers(list(range(10)), processes=3) == 3
+
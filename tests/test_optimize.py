@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from ts_analysis import footprints, optimize, sensitivity, shocks
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.incremental import IncrementalSolver
+from ts_analysis.solver import LeontiefSolver
+
+REGIONS = ['EU', 'LAC']
+SPACE = {'z:Organic composting': (0.0, 2.0), 'Y:P&N Fertilisers': (0.0, 2.0)}
+LABELS = ['Value Added', 'Employment', 'GHG']
+
+
+def dominated(F):
+    # Brute force: rows some other row is at least as good as everywhere and better once
+    F = np.asarray(F)
+    return np.array([((F >= f).all(axis=1) & (F > f).any(axis=1)).any() for f in F])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_pareto_matches_brute_force(seed):
+    # Rounded values, so ties and duplicates occur
+    F = np.round(np.random.default_rng(seed).normal(size=(200, 3)), 1)
+    np.testing.assert_array_equal(optimize.pareto(F), ~dominated(F))
+
+
+@pytest.fixture
+def problem(database, shock):
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = LeontiefSolver(database.z)
+    dA, _ = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    return (database.z, database.Y, database.X, M, shock, L, IncrementalSolver(L, dA))
+
+
+def exact_totals(problem, parameters):
+    z, Y, X, M, shock, L, _ = problem
+    dA, Y_ce = shocks.shock_delta(z, Y, X, shocks.parametrize(shock, parameters))
+    fp = footprints.batched_footprints(
+        M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+        {'baseline': Y, 'CE scenario': Y_ce}, REGIONS)
+    return harmonize(fp, regions=REGIONS).groupby('Region').sum()[LABELS]
+
+
+def test_workbook_scenario_is_candidate_zero(problem):
+    # Unrefined scores are the linearization, exact at the workbook scenario
+    frontier = optimize.optimize(*problem, space=SPACE, draws=0, regions=REGIONS, seed=0,
+                                 refine=False)
+    expected = exact_totals(problem, {})
+    for _, row in frontier.iterrows():
+        assert row['Candidate'] == 0 and not row['Exact']
+        np.testing.assert_allclose(row[LABELS].to_numpy(dtype=float),
+                                   expected.loc[row['Region']], rtol=1e-8, atol=1e-10)
+
+
+def test_refined_frontier(problem):
+    frontier = optimize.optimize(*problem, space=SPACE, draws=60, regions=REGIONS, seed=0,
+                                 size=10)
+    assert frontier['Exact'].all()
+    for region, rows in frontier.groupby('Region'):
+        assert len(rows) <= 10
+        assert not dominated(rows[LABELS].to_numpy()).any()
+        # Within the space, and scored by exact runs
+        for name, (low, high) in SPACE.items():
+            assert rows[name].between(low, high).all()
+        for _, row in rows.head(3).iterrows():
+            totals = exact_totals(problem, {name: row[name] for name in SPACE})
+            np.testing.assert_allclose(row[LABELS].to_numpy(dtype=float), totals.loc[region],
+                                       rtol=1e-8, atol=1e-10)
+        assert rows['Win-win magnitude'].is_monotonic_decreasing
+
+
+def test_max_loss(problem):
+    options = dict(space=SPACE, draws=60, regions=REGIONS, seed=0, refine=False)
+    assert (optimize.optimize(*problem, **options)[LABELS] < -1.0).any(axis=None)
+    frontier = optimize.optimize(*problem, max_loss=1.0, **options)
+    assert len(frontier) and (frontier[LABELS] >= -1.0).all(axis=None)
+
+
+def test_jacobian_matches_finite_differences(problem):
+    z, Y, X, M, shock, L, L_ce = problem
+    _, derivatives = sensitivity.sensitivity(z, Y, X, M, shock, L, L_ce, REGIONS)
+    p0, J = optimize.jacobian(derivatives, shock, SPACE)
+    np.testing.assert_array_equal(p0, [1.0, 1.0])
+    h = 1e-5
+    for i, name in enumerate(SPACE):
+        values = []
+        for step in [h, -h]:
+            dA, Y_ce = shocks.shock_delta(z, Y, X, shocks.parametrize(shock, {name: 1 + step}))
+            fp = footprints.batched_footprints(
+                M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+                {'baseline': Y, 'CE scenario': Y_ce}, REGIONS)
+            values.append(harmonize(fp, regions=REGIONS).stack(future_stack=True)
+                          .reindex(derivatives.columns).to_numpy())
+        central = (values[0] - values[1]) / (2 * h)
+        np.testing.assert_allclose(J.iloc[i].to_numpy(), central, rtol=0,
+                                   atol=1e-4 * np.abs(central).max())
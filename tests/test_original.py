@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Package results against the row-wise functions of the original script."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import original
+from benchmarks.run import SCALES, compare
+from ts_analysis import dimensions, shocks
+from ts_analysis.cube import ResultCube
+from ts_analysis.pipeline import default_analyses
+from ts_analysis.synthetic import synthetic_mrio, synthetic_shock
+
+COUNTRIES = ['EU footprint', 'LAC footprint']
+IMPACTS = ['Value Added', 'Employment', 'GHG']
+SECTORS = ['P&N Fertilisers', 'Agriculture']
+FUNCTIONS = {'geo': original.ts_geo, 'imp': original.ts_imp, 'sec': original.ts_sec}
+
+
+def original_norm(database, shock):
+    # Scenario through explicit Leontief inverses, as MARIO's shock_calc
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    z_ce = database.z + dA.toarray()
+    L_ce = pd.DataFrame(np.linalg.inv(np.eye(len(z_ce)) - z_ce.to_numpy()),
+                        index=z_ce.index, columns=z_ce.columns)
+    return original.harmonize(database.Y, database.w, Y_ce, L_ce, database.v, database.e)
+
+
+def original_results(norm_new):
+    analyses = default_analyses(COUNTRIES, IMPACTS, SECTORS)
+    return {name: (dimension, FUNCTIONS[dimension](norm_new, selection, label), label)
+            for name, (dimension, selection, label) in analyses.items()}
+
+
+def assert_results_equal(actual, expected):
+    for a, e in zip(actual, expected):
+        if isinstance(e, pd.Series):
+            pd.testing.assert_series_equal(a, e, check_names=False, check_index_type=False,
+                                           rtol=1e-9)
+        else:
+            pd.testing.assert_frame_equal(a, e, check_dtype=False, check_names=False,
+                                          check_index_type=False, check_column_type=False,
+                                          rtol=1e-9)
+
+
+@pytest.fixture(scope='module')
+def reference(database, shock_path):
+    return original_norm(database, shocks.read_shock(shock_path))
+
+
+def test_harmonize(norm_new, reference):
+    pd.testing.assert_frame_equal(norm_new, reference, check_names=False,
+                                  check_index_type=False, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('cube', [False, True])
+@pytest.mark.parametrize('dimension, selection, label',
+                         default_analyses(COUNTRIES, IMPACTS, SECTORS).values())
+def test_dimensions(norm_new, reference, cube, dimension, selection, label):
+    data = ResultCube.from_frame(norm_new, 'CE scenario') if cube else norm_new
+    function = getattr(dimensions, dimension)
+    assert_results_equal(function(data, selection, label),
+                         FUNCTIONS[dimension](reference, selection, label))
+
+
+def test_golden_files(tmp_path):
+    # The golden outputs of the small benchmark are those of the original code
+    database = synthetic_mrio(*SCALES['small'], seed=0)
+    shock = shocks.read_shock(synthetic_shock(database, tmp_path / 'shock.xlsx'))
+    folder = Path(__file__).resolve().parents[1] / 'benchmarks' / 'golden' / 'small'
+    assert compare(original_results(original_norm(database, shock)), folder) == []
+
+
+@pytest.mark.parametrize('cube', [False, True])
+def test_geo_in_selection_order(regional_norm, cube):
+    # Regions neither in the index nor in alphabetical order
+    data = ResultCube.from_frame(regional_norm) if cube else regional_norm
+    selection = ['RoW footprint', 'LAC footprint']
+    assert_results_equal(dimensions.geo(data, selection, 'GHG'),
+                         original.ts_geo(regional_norm, selection, 'GHG'))
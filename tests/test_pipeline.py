@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from ts_analysis import cache, shocks
+from ts_analysis.pipeline import STAGES, Pipeline
+from ts_analysis.synthetic import SyntheticDatabase, synthetic_shock
+
+
+class ShockedDatabase(SyntheticDatabase):
+    """Synthetic table with the shock_calc of a MARIO Database."""
+
+    calls = 0
+
+    def shock_calc(self, io, Y, z, scenario, force_rewrite):
+        ShockedDatabase.calls += 1
+        dA, Y_ce = shocks.shock_delta(self.z, self.Y, self.X, shocks.read_shock(io))
+        self.matrices = {scenario: {'Y': Y_ce, 'z': self.z + dA.toarray()}}
+        self.matrices[scenario]['w'] = SyntheticDatabase(
+            self.matrices[scenario]['z'], Y_ce, self.X, self.v, self.e, self.EY).w
+
+
+def pipeline(database, shock_path, folder, **config):
+    p = Pipeline(shock=shock_path, results=folder / 'results', cache_dir=folder / 'cache',
+                 reports=None, **{'norm': None, **config})
+    p.results['aggregate'] = database
+    return p
+
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse'])
+def test_scenario_cache(database, shock_path, tmp_path, backend):
+    shocked = ShockedDatabase(database.z, database.Y, database.X, database.v, database.e,
+                              database.EY)
+    ShockedDatabase.calls = 0
+    expected = pipeline(database, shock_path, tmp_path).get('harmonize')
+    runs = [pipeline(shocked, shock_path, tmp_path, incremental=False, backend=backend)
+            for _ in range(2)]
+    for p in runs:
+        pd.testing.assert_frame_equal(p.get('harmonize'), expected, rtol=1e-9)
+    assert ShockedDatabase.calls == 1  # The second run hits the cache
+    # Same scenario system on a miss and on a hit: the Leontief inverse
+    miss, hit = (p.get('shock')['L']['CE scenario'] for p in runs)
+    assert type(miss) is type(hit) is pd.DataFrame
+
+
+def keyed(database, shock_path, folder, **config):
+    p = pipeline(database, shock_path, folder, norm=folder / 'norm_new.parquet', **config)
+    p.requested = set()  # As get('harmonize') outside run()
+    return p
+
+
+def test_norm_reused_with_the_same_inputs(database, shock_path, tmp_path):
+    norm_new = keyed(database, shock_path, tmp_path).get('harmonize')
+    p = keyed(database, shock_path, tmp_path)
+    pd.testing.assert_frame_equal(p.get('harmonize'), norm_new)
+    assert 'footprint' not in p.results  # Read from disk
+
+
+@pytest.mark.parametrize('change', ['shock', 'regions', 'database'])
+def test_norm_recomputed_when_inputs_change(database, shock_path, tmp_path, change):
+    keyed(database, shock_path, tmp_path).get('harmonize')
+    config = {}
+    if change == 'shock':
+        shock_path = synthetic_shock(database, tmp_path / 'shock.xlsx', cut=0.6)
+    elif change == 'regions':
+        config = {'regions': ['EU', 'RoW', 'LAC']}
+    else:
+        database = SyntheticDatabase(database.z * 1.01, database.Y, database.X, database.v,
+                                     database.e, database.EY)
+    p = keyed(database, shock_path, tmp_path, **config)
+    expected = pipeline(database, shock_path, tmp_path, **config).get('harmonize')
+    pd.testing.assert_frame_equal(p.get('harmonize'), expected)
+    assert 'footprint' in p.results
+    # The recomputed norm_new replaces the stale one on disk
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'norm_new.parquet'), expected)
+
+
+def test_norm_keyed_on_the_database_inputs(database, shock_path, tmp_path, monkeypatch):
+    # Without the database, an analysis-only run keys norm_new on the inputs
+    # the database is built from (as the database cache)
+    (tmp_path / 'exio').mkdir()
+    inputs = {'path_exio': tmp_path / 'exio', 'path_extensions': tmp_path / 'extensions.xlsx',
+              'path_aggr': tmp_path / 'aggregation.xlsx'}
+    for path in [tmp_path / 'exio' / 'F.txt', inputs['path_extensions'], inputs['path_aggr']]:
+        path.write_text(path.name)
+    monkeypatch.setattr(cache, 'cached_database', lambda build, **options: database)
+
+    def analysis(**config):
+        p = Pipeline(shock=shock_path, norm=tmp_path / 'norm_new.parquet', cache_dir=tmp_path,
+                     results=tmp_path / 'results', reports=None, **inputs, **config)
+        p.run(['classify'])
+        return p
+
+    analysis()
+    assert 'footprint' not in analysis().results
+    inputs['path_aggr'].write_text('changed')
+    assert 'footprint' in analysis().results
+    assert 'footprint' in analysis(levels=['Region', 'Sector']).results
+
+
+def test_run_skips_load_on_a_cache_hit(database, shock_path, tmp_path, monkeypatch):
+    def load(self):
+        raise AssertionError('load runs on a cache hit')
+
+    monkeypatch.setattr(cache, 'cached_database', lambda build, **options: database)
+    monkeypatch.setattr(Pipeline, '_load', load)
+    monkeypatch.setattr(Pipeline, '_extend', load)
+    monkeypatch.setattr(Pipeline, '_database_key', lambda self: 'key')
+    p = Pipeline(shock=shock_path, norm=None, results=tmp_path / 'results',
+                 cache_dir=tmp_path / 'cache', reports=None)
+    results = p.run(STAGES)
+    assert 'export' in results and 'load' not in results and 'extend' not in results
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import json
+import time
+
+import pytest
+
+from ts_analysis.pipeline import Pipeline
+from ts_analysis.profiling import Profiler
+
+
+def test_nested_stage_records(tmp_path):
+    profiler = Profiler(memory=True)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            data = bytearray(1 << 22)
+            time.sleep(0.02)
+        del data
+        time.sleep(0.01)
+    inner, outer = profiler.records
+    assert (inner['stage'], inner['parent']) == ('inner', 'outer')
+    assert (outer['stage'], outer['parent']) == ('outer', None)
+    assert outer['wall'] >= inner['wall'] >= 0.02
+    assert outer['self_wall'] == pytest.approx(outer['wall'] - inner['wall'])
+    # The allocation of the inner stage is part of the outer peak
+    assert outer['allocated_peak'] >= inner['allocated_peak'] >= 1 << 22
+
+    report = json.loads(profiler.write(tmp_path / 'report.json', {'scale': 'test'}).read_text())
+    assert {'started', 'finished', 'environment', 'config', 'stages', 'wall',
+            'peak_rss'} <= set(report)
+    assert report['config'] == {'scale': 'test'}
+    assert report['wall'] == pytest.approx(outer['wall'])
+
+
+def test_hooks(tmp_path):
+    entered = []
+
+    @contextlib.contextmanager
+    def hook(stage):
+        entered.append(stage)
+        yield
+
+    profiler = Profiler(hook=hook)
+    with profiler.stage('a'):
+        with profiler.stage('b'):
+            pass
+    assert entered == ['a', 'b']
+
+    profiler = Profiler(hook='cprofile', folder=tmp_path)
+    with profiler.stage('a'):
+        with profiler.stage('b'):
+            sum(range(1000))
+    # One profile per outermost stage, the nested stages included
+    assert [path.name for path in tmp_path.iterdir()] == ['a.prof']
+
+
+def test_pipeline_run_report(database, shock_path, tmp_path):
+    p = Pipeline(shock=shock_path, norm=None, results=tmp_path / 'results',
+                 reports=tmp_path / 'reports')
+    p.results['aggregate'] = database
+    p.run(['harmonize'])
+    path, = (tmp_path / 'reports').glob('run_*.json')
+    report = json.loads(path.read_text())
+    stages = {record['stage']: record['parent'] for record in report['stages']}
+    assert stages == {'shock': 'footprint', 'footprint': 'harmonize', 'harmonize': None}
+    assert report['config']['shock'] == str(shock_path)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_analysis import footprints, sensitivity, shocks
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.incremental import IncrementalSolver
+from ts_analysis.solver import LeontiefSolver
+
+REGIONS = ['EU', 'LAC']
+
+
+@pytest.fixture
+def chained(shock):
+    # Repeated cells: the derivatives have to follow the chain of updates
+    z = shock['z'].iloc[[0]].assign(type='Percentage', value=0.1)
+    Y = shock['Y'].iloc[[1]].assign(type='Absolute', value=5.0)
+    return dict(shock, z=pd.concat([shock['z'], z], ignore_index=True),
+                Y=pd.concat([shock['Y'], Y], ignore_index=True))
+
+
+def run(database, M, L, shock):
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    fp = footprints.batched_footprints(
+        M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+        {'baseline': database.Y, 'CE scenario': Y_ce}, REGIONS)
+    return harmonize(fp, regions=REGIONS).to_numpy()
+
+
+@pytest.mark.parametrize('repeated', [False, True])
+def test_derivatives_match_finite_differences(database, shock, chained, repeated):
+    shock = chained if repeated else shock
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    L = LeontiefSolver(database.z)
+    dA, _ = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    norm_new, derivatives = sensitivity.sensitivity(
+        database.z, database.Y, database.X, M, shock, L, IncrementalSolver(L, dA), REGIONS)
+    reference = run(database, M, L, shock)
+    np.testing.assert_allclose(norm_new.to_numpy(), reference, rtol=1e-9, atol=1e-9)
+
+    for sheet, row in derivatives.index:
+        value = shock[sheet].loc[row, 'value']
+        h = 1e-6 * max(1, abs(value))
+        values = []
+        for step in [h, -h]:
+            variant = dict(shock, **{sheet: shock[sheet].copy()})
+            variant[sheet].loc[row, 'value'] = value + step
+            values.append(run(database, M, L, variant))
+        central = (values[0] - values[1]) / (2 * h)
+        np.testing.assert_allclose(
+            derivatives.loc[(sheet, row)].to_numpy().reshape(central.shape), central,
+            rtol=0, atol=1e-4 * max(np.abs(central).max(), 1e-12))
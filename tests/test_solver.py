@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from ts_analysis import backend, shocks
+from ts_analysis.incremental import IncrementalSolver
+from ts_analysis.solver import METHODS, LeontiefSolver
+
+METHODS = METHODS[1:]
+
+
+@pytest.fixture
+def system(database):
+    rng = np.random.default_rng(0)
+    A = database.z.to_numpy()
+    return A, rng.random((len(A), 3))
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('trans', [False, True])
+def test_methods_match_dense_inverse(system, method, trans):
+    A, Y = system
+    B = np.eye(len(A)) - A
+    expected = np.linalg.solve(B.T if trans else B, Y)
+    solver = LeontiefSolver(backend.to_sparse(A) if method != 'dense' else A, method=method)
+    np.testing.assert_allclose(solver.solve(Y, trans=trans), expected, rtol=1e-8)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_zero_columns(system, method):
+    A, _ = system
+    solver = LeontiefSolver(A, method=method)
+    assert solver.solve(np.zeros((len(A), 0))).shape == (len(A), 0)
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('trans', [False, True])
+def test_incremental_matches_refactorization(database, shock, system, method, trans):
+    _, Y = system
+    z = database.z
+    dA, _ = shocks.shock_delta(z, database.Y, database.X, shock)
+    solver = IncrementalSolver(LeontiefSolver(z, method=method), dA)
+    expected = LeontiefSolver(z.to_numpy() + dA.toarray()).solve(Y, trans=trans)
+    np.testing.assert_allclose(solver.solve(Y, trans=trans), expected, rtol=1e-8)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_incremental_y_only_shock(database, shock, system, method):
+    # A shock without z rows leaves A unchanged: a rank-0 update
+    _, Y = system
+    shock['z'] = shock['z'].iloc[:0]
+    dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X, shock)
+    assert dA.nnz == 0
+    base = LeontiefSolver(database.z, method=method)
+    solver = IncrementalSolver(base, dA)
+    assert solver.rank == 0
+    for trans in [False, True]:
+        np.testing.assert_allclose(solver.solve(Y, trans=trans), base.solve(Y, trans=trans))
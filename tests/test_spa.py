@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from ts_analysis.spa import top_paths
+
+DEPTH = 4
+
+
+def brute_force(A, A_ce, m, y, y_ce, depth=DEPTH):
+    # Every path up to `depth` upstream steps, by absolute change
+    paths = []
+    for length in range(1, depth + 2):
+        for path in itertools.product(range(len(A)), repeat=length):
+            b, c = y[path[0]], y_ce[path[0]]
+            for down, up in zip(path[:-1], path[1:]):
+                b, c = b * A[up, down], c * A_ce[up, down]
+            b, c = b * m[path[-1]], c * m[path[-1]]
+            if b or c:
+                paths.append((abs(c - b), path, b, c))
+    return sorted(paths, key=lambda p: -p[0])
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    n = 5
+    A = rng.random((n, n)) * (rng.random((n, n)) < 0.6) * 0.35
+    dA = np.zeros((n, n))
+    dA[1, 2], dA[0, 2] = 0.2, -A[0, 2] * 0.5
+    return A, dA, rng.random(n), rng.random(n)
+
+
+@pytest.mark.parametrize('flip', [[], [2], [0, 3]])
+def test_top_paths_match_brute_force(table, flip):
+    # Final demand changing sign in the flipped sectors
+    A, dA, m, y = table
+    y_ce = y * 1.3
+    y_ce[flip] = -y[flip]
+    expected = brute_force(A, A + dA, m, y, y_ce)[:10]
+    paths, stats = top_paths(A, sparse.csc_matrix(dA), m, y, y_ce, k=10, max_depth=DEPTH)
+    assert stats['exhaustive']
+    assert [p for p, _, _ in paths] == [p for _, p, _, _ in expected]
+    np.testing.assert_allclose([c - b for _, b, c in paths], [c - b for _, _, b, c in expected])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from ts_analysis.pipeline import classify, default_analyses, export
+from ts_analysis.store import ResultStore
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def results(norm_new):
+    analyses = default_analyses(['EU footprint', 'LAC footprint'],
+                                ['Value Added', 'Employment', 'GHG'],
+                                ['P&N Fertilisers', 'Agriculture'])
+    return classify(norm_new, analyses)
+
+
+def test_round_trip(results, tmp_path):
+    store = ResultStore(tmp_path)
+    for name, (dimension, result, label) in results.items():
+        store.write(dimension, name, result, label)
+    for name, (dimension, (ts_results, data, total), _) in results.items():
+        ts_results_, data_, total_ = store.results(dimension, name)
+        pd.testing.assert_frame_equal(ts_results_, ts_results.reset_index(drop=True),
+                                      check_dtype=False)
+        pd.testing.assert_frame_equal(data_, data, check_dtype=False, check_names=False,
+                                      check_index_type=False, check_column_type=False)
+        pd.testing.assert_series_equal(total_, total, check_dtype=False, check_names=False,
+                                       check_index_type=False)
+
+
+def test_excel_sheets(results, tmp_path, monkeypatch):
+    # The workbooks of the original save_*_res functions
+    monkeypatch.chdir(tmp_path)
+    export(results, ResultStore(tmp_path / 'store'), excel=True)
+    for dimension in ['geo', 'imp', 'sec']:
+        path, = tmp_path.glob(f'{dimension}_results_*.xlsx')
+        names = [name for name, (dim, _, _) in results.items() if dim == dimension]
+        expected = [name + suffix for name in names for suffix in ['', '_all', '_sum']]
+        assert pd.ExcelFile(path).sheet_names == expected
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from ts_analysis import footprints, shocks, sweep
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.incremental import IncrementalSolver
+from ts_analysis.pipeline import classify, default_analyses
+from ts_analysis.solver import LeontiefSolver
+
+REGIONS = ['EU', 'LAC']
+GRID = {'z:Organic composting': [0.5, 1.5], 'Y:P&N Fertilisers': [0.0, 2.0]}
+
+
+def test_parameter_grid(shock):
+    variants = sweep.parameter_grid(shock, GRID)
+    assert len(variants) == 4
+    assert variants[1] == {'z:Organic composting': 0.5, 'Y:P&N Fertilisers': 2.0}
+
+
+def test_sweep_matches_direct_runs(database, shock, tmp_path):
+    M = footprints.intensity_matrix(database.v, database.e, list(INDICATORS))
+    baseline = sweep.share_baseline(database.z, database.Y, database.X, M, tmp_path / 'baseline')
+    analyses = default_analyses(['EU footprint', 'LAC footprint'],
+                                ['Value Added', 'Employment', 'GHG'],
+                                ['P&N Fertilisers', 'Agriculture'])
+    variants = sweep.parameter_grid(shock, GRID)
+    sweep.run(baseline, shock, variants, analyses, tmp_path / 'sweep', regions=REGIONS,
+              processes=2)
+    summaries = sweep.read_sweep(tmp_path / 'sweep')
+
+    L = LeontiefSolver(database.z)
+    for variant, parameters in enumerate(variants):
+        # One Woodbury run of the variant, classified on the DataFrame path
+        dA, Y_ce = shocks.shock_delta(database.z, database.Y, database.X,
+                                      shocks.parametrize(shock, parameters))
+        fp = footprints.batched_footprints(
+            M, {'baseline': L, 'CE scenario': IncrementalSolver(L, dA)},
+            {'baseline': database.Y, 'CE scenario': Y_ce}, REGIONS)
+        results = classify(harmonize(fp, regions=REGIONS), analyses)
+        expected = pd.concat([ts_results.assign(analysis=name)
+                              for name, (_, (ts_results, _, _), _) in results.items()],
+                             ignore_index=True)
+        actual = summaries[summaries['variant'] == variant].reset_index(drop=True)
+        assert (actual[list(parameters)] == pd.Series(parameters)).all(axis=None)
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False,
+                                      rtol=1e-9)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+
+Reusable building blocks for the trade-offs and synergies framework
+used by ts_analysis_v3.0.py.
+
+Modules:
+    - cache: content-addressed on-disk cache of the prepared database and
+      of the scenario results (LRU within a size budget)
+    - concordance: aggregation through persisted sparse concordance matrices
+    - footprints: batched footprint calculation for several indicators,
+      final-demand regions and scenarios
+    - backend: dense/sparse representation of the coefficient matrices
+    - solver: inverse-free Leontief solves on a factorized (I - A), direct or
+      iterative, also transposed
+    - shocks: MARIO shock workbooks as sparse changes to z and Y
+    - harmonize: vectorized relative changes of all regions and indicators
+      (norm_new)
+    - incremental: low-rank (Woodbury) scenario updates of a baseline solver
+    - ghg: streaming reader of the GHG rows of EXIOBASE extension files and
+      characterization of several GHG metrics in one pass
+    - classify: vectorized N-dimensional trade-off/synergy classification
+    - cube: contiguous region × sector × indicator × scenario result cube
+    - dimensions: geographical, impact and sectoral analyses (pure compute)
+    - plots: figures of the analyses and parallel headless export
+    - store: partitioned Parquet store of results with optional Excel export
+    - sweep: parallel sweeps over shock parameters on a memory-mapped baseline
+    - montecarlo: batched Monte Carlo with streaming statistics
+    - multiyear: parallel, memory-bounded runs over EXIOBASE years
+    - sensitivity: adjoint derivatives of norm_new to the shock values and
+      the values closest to flipping each result
+    - optimize: Pareto frontiers of intervention portfolios from the
+      linearized scenario, refined with exact incremental runs
+    - spa: structural path analysis of the changes, top-k by branch and bound
+    - synthetic: seeded synthetic MRIO tables and shock workbooks at any scale
+    - profiling: per-stage time and memory records and JSON run reports
+    - pipeline: lazily evaluated, cached stages of the whole analysis, also
+      runnable as `python -m ts_analysis [stage ...]`
+"""
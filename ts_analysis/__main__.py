@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+
+Command line entry point of the pipeline, running only the requested stages:
+
+    python -m ts_analysis                      # all stages
+    python -m ts_analysis harmonize            # database, scenario, norm_new
+    python -m ts_analysis classify export --excel --figures figures
+    python -m ts_analysis --years 1995-2022 --processes 4
+
+Stages that are not requested are reused from their cache (.ts_cache/ for
+the aggregated database, --norm for norm_new) when it was computed from the
+same inputs and settings. A JSON report
+of the time and memory of every stage is written to results/reports/.
+"""
+
+import argparse
+import json
+
+from ts_analysis.pipeline import DEFAULTS, STAGES, Pipeline
+
+
+def parse_years(text):
+    # '1995-2022' or '2015,2020' as a list of years
+    if '-' in text:
+        start, end = text.split('-')
+        return list(range(int(start), int(end) + 1))
+    return [int(year) for year in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m ts_analysis',
+        description='Trade-offs and synergies pipeline.')
+    parser.add_argument('stages', nargs='*', metavar='stage',
+                        help='stages to run: ' + ', '.join(STAGES))
+    parser.add_argument('--config', help='JSON file overriding the default settings')
+    parser.add_argument('--norm', help='norm_new Parquet file (default: %s)' % DEFAULTS['norm'])
+    parser.add_argument('--results', help='result store folder (default: %s)' % DEFAULTS['results'])
+    parser.add_argument('--excel', action='store_true', default=None,
+                        help='also write the geo/imp/sec Excel workbooks')
+    parser.add_argument('--figures', help='folder for the figures')
+    parser.add_argument('--profile', nargs='?', const=True, choices=['cprofile'],
+                        help='trace allocations per stage (and write cProfile files with '
+                             '--profile cprofile)')
+    parser.add_argument('--years', help='multi-year run, e.g. 1995-2022 or 2015,2020 '
+                                        '(norm_new and classification of every year)')
+    parser.add_argument('--processes', type=int, help='parallel years (default: CPUs)')
+    args = parser.parse_args(argv)
+    # Checked here: argparse rejects an empty list against `choices`
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error('unknown stage(s): ' + ', '.join(unknown))
+
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    overrides = {key: value for key, value in
+                 [('norm', args.norm), ('results', args.results),
+                  ('excel', args.excel), ('figures', args.figures),
+                  ('profile', args.profile)]
+                 if value is not None}
+    pipeline = Pipeline(config, **overrides)
+    if args.years:
+        pipeline.years(parse_years(args.years), processes=args.processes)
+        return
+    pipeline.run(args.stages or STAGES)
+
+
+if __name__ == '__main__':
+    main()
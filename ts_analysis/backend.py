@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+
+Dense and sparse matrix backends.
+
+EXIOBASE technical coefficients are mostly zeros. With the sparse backend,
+Z, z and the shocked scenario matrices are kept as pandas DataFrames of
+sparse columns (labels included), whose values convert to SciPy CSR/CSC
+matrices without ever being densified. The helpers below accept both
+backends, so the solver, shock and footprint code is written once.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+BACKENDS = ['dense', 'sparse']
+
+
+def is_sparse(M):
+    """True for SciPy sparse matrices and DataFrames of sparse columns."""
+    if sparse.issparse(M):
+        return True
+    return isinstance(M, pd.DataFrame) and len(M.columns) > 0 and \
+        all(isinstance(dtype, pd.SparseDtype) for dtype in M.dtypes)
+
+
+def to_sparse(M, format='csc'):
+    """SciPy sparse matrix of a dense or sparse DataFrame or array."""
+    if sparse.issparse(M):
+        return M.asformat(format)
+    if isinstance(M, pd.DataFrame) and is_sparse(M):
+        return M.sparse.to_coo().asformat(format).astype(float)
+    return sparse.csc_matrix(np.asarray(M, dtype=float)).asformat(format)
+
+
+def sparse_frame(M, index=None, columns=None):
+    """DataFrame of sparse columns from a dense/sparse DataFrame or matrix."""
+    if isinstance(M, pd.DataFrame):
+        index, columns = M.index, M.columns
+    return pd.DataFrame.sparse.from_spmatrix(to_sparse(M), index=index, columns=columns)
+
+
+def values(M, format='csr'):
+    """Values of M in its own backend: a SciPy matrix or a dense array."""
+    if is_sparse(M):
+        return to_sparse(M, format)
+    return np.asarray(M, dtype=float)
+
+
+def convert(M, backend):
+    """M in the 'dense' or 'sparse' backend, keeping its labels."""
+    if backend == 'sparse':
+        return M if is_sparse(M) else sparse_frame(M)
+    if backend == 'dense':
+        if not is_sparse(M):
+            return M
+        if isinstance(M, pd.DataFrame):
+            return M.sparse.to_dense()
+        return M.toarray()
+    raise ValueError(f"Unknown backend '{backend}'")
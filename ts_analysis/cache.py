@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+
+Persistent on-disk cache of the parsed, extended and aggregated database.
+
+Parsing EXIOBASE, adding the extensions and aggregating takes minutes of
+text and Excel parsing on every run. The resulting matrices are stored once
+as .npy files (memory-mappable) plus a labels.json/units.json, in a folder
+named after the hash of every input (raw database folder, extension and
+aggregation workbooks) and of the settings used with them (the aggregated
+levels). Any change in the inputs gives a new key, so stale entries are
+never loaded.
+
+ScenarioCache keeps the results of MARIO's shock_calc (scenario Y, z and
+Leontief inverse w) the same way, keyed on the shock workbook content, the
+fingerprint of the baseline matrices and the shock options, and evicts the
+least recently used entries beyond a total size.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MATRICES = ['Z', 'Y', 'V', 'E', 'EY', 'z', 'v', 'e', 'w', 'X']
+CACHE_DIR = '.ts_cache'
+
+
+def path_digest(path, digest=None, chunk=1 << 20):
+    # sha256 of a file, or of every file (name + content) in a folder
+    digest = digest or hashlib.sha256()
+    path = Path(path)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(chunk), b''):
+                digest.update(block)
+    return digest
+
+
+def cache_key(paths, extra=None):
+    """Content hash of all input paths (and optional extra settings)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        path_digest(path, digest)
+    if extra is not None:
+        digest.update(json.dumps(extra, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def database_fingerprint(matrices, digest=None):
+    """Content hash of {name: DataFrame} (labels and float64 values)."""
+    digest = digest or hashlib.sha256()
+    for name in sorted(matrices):
+        df = matrices[name]
+        df = df.to_frame() if isinstance(df, pd.Series) else df
+        digest.update(name.encode())
+        digest.update(json.dumps([labels_to_json(df.index), labels_to_json(df.columns)],
+                                 default=str).encode())
+        digest.update(np.ascontiguousarray(df.to_numpy(dtype=float)).data)
+    return digest.hexdigest()
+
+
+def labels_to_json(index):
+    return {'names': list(index.names),
+            'values': [list(i) if isinstance(i, tuple) else i for i in index]}
+
+
+def labels_from_json(labels):
+    if len(labels['names']) > 1:
+        return pd.MultiIndex.from_tuples([tuple(i) for i in labels['values']],
+                                         names=labels['names'])
+    return pd.Index(labels['values'], name=labels['names'][0])
+
+
+def save_matrices(matrices, units, folder):
+    """
+    Write {name: DataFrame} and the units ({level: DataFrame with a 'unit'
+    column}) to `folder`. The folder is written next to its final place and
+    renamed at the end, so a crash never leaves a half-written entry.
+    """
+    folder = Path(folder)
+    tmp = folder.with_name(folder.name + '.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    labels = {}
+    for name, df in matrices.items():
+        df = df.to_frame() if isinstance(df, pd.Series) else df
+        np.save(tmp / f'{name}.npy', np.ascontiguousarray(df.to_numpy(dtype=float)))
+        labels[name] = {'index': labels_to_json(df.index),
+                        'columns': labels_to_json(df.columns)}
+    with open(tmp / 'labels.json', 'w') as f:
+        json.dump(labels, f)
+    with open(tmp / 'units.json', 'w') as f:
+        json.dump({level: df['unit'].to_dict() for level, df in units.items()}, f)
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp, folder)
+
+
+def load_matrices(folder, mmap=True):
+    """
+    Load the matrices and units saved by save_matrices. With mmap=True the
+    values are copy-on-write memory maps, so only the pages used are read.
+    """
+    folder = Path(folder)
+    with open(folder / 'labels.json') as f:
+        labels = json.load(f)
+    with open(folder / 'units.json') as f:
+        units = {level: pd.DataFrame({'unit': pd.Series(items)})
+                 for level, items in json.load(f).items()}
+
+    matrices = {}
+    for name, lab in labels.items():
+        values = np.load(folder / f'{name}.npy', mmap_mode='c' if mmap else None)
+        matrices[name] = pd.DataFrame(values, index=labels_from_json(lab['index']),
+                                      columns=labels_from_json(lab['columns']), copy=False)
+    return matrices, units
+
+
+def build_database(matrices, units, name='cached database'):
+    """Rebuild a MARIO Database from cached matrices (no recalculation)."""
+    import mario
+
+    db = mario.Database(
+        name=name,
+        table='IOT',
+        Z=matrices['Z'],
+        E=matrices['E'],
+        V=matrices['V'],
+        Y=matrices['Y'],
+        EY=matrices['EY'],
+        units=units)
+    db.matrices['baseline'].update(
+        {key: df for key, df in matrices.items() if key in ['z', 'v', 'e', 'w', 'X']})
+    return db
+
+
+def cached_database(build, inputs=(), cache_dir=CACHE_DIR, mmap=True, extra=None, key=None):
+    """
+    Return the database produced by `build()` (a MARIO Database), reusing the
+    cached copy keyed on the content of `inputs` and the settings `extra`
+    (or on `key`, their precomputed cache_key) when there is one.
+    """
+    folder = Path(cache_dir) / (key or cache_key(inputs, extra))
+    if not (folder / 'labels.json').exists():
+        db = build()
+        matrices = {name: getattr(db, name) for name in MATRICES}
+        save_matrices(matrices, db.units, folder)
+        return db
+    return build_database(*load_matrices(folder, mmap=mmap))
+
+
+class ScenarioCache:
+    """
+    Scenario results on disk ({name: DataFrame}, memory-mappable .npy files
+    as save_matrices), at most max_bytes in total: storing an entry evicts
+    the least recently used ones.
+    """
+
+    def __init__(self, folder, max_bytes=2 ** 34):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+
+    def key(self, shock, baseline, options=None):
+        """Key of a shock workbook applied to the baseline {name: DataFrame}."""
+        return cache_key([shock], {'database': database_fingerprint(baseline),
+                                   'options': options})
+
+    def get(self, key, mmap=True):
+        """The matrices stored under key, or None."""
+        folder = self.folder / key
+        if not (folder / 'labels.json').exists():
+            return None
+        os.utime(folder)  # Last use, for the eviction order
+        matrices, _ = load_matrices(folder, mmap=mmap)
+        return matrices
+
+    def put(self, key, matrices):
+        save_matrices(matrices, {}, self.folder / key)
+        self.evict(keep=key)
+
+    def entries(self):
+        """(key, bytes, last use) of every entry, least recently used first."""
+        entries = []
+        for folder in self.folder.glob('*'):
+            if folder.is_dir() and (folder / 'labels.json').exists():
+                size = sum(f.stat().st_size for f in folder.iterdir())
+                entries.append((folder.name, size, folder.stat().st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Remove the least recently used entries beyond max_bytes (never `keep`)."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                shutil.rmtree(self.folder / key, ignore_errors=True)
+                total -= size
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+
+Trade-off and synergy classification for any number of dimensions.
+
+Each row of harmonized values (e.g. EU vs LAC footprint, or Value Added vs
+Employment vs GHG) is reduced to its sign pattern: every dimension is a
+'lose' (< 0), 'tie' (= 0) or 'win' (> 0) digit of a base-3 code, with the
+first column as the most significant digit. Labels, counts and Euclidean
+magnitudes per category then come from one vectorized pass and a bincount.
+ts_pairwise does the same for every pair of regions at once.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+OUTCOMES = ('lose', 'tie', 'win')
+
+
+def ts_codes(values):
+    # Base-3 sign-pattern code of each row (NaN is treated as a tie)
+    values = np.asarray(values, dtype=float)
+    digits = (np.sign(np.nan_to_num(values)) + 1).astype(np.int64)
+    weights = 3 ** np.arange(values.shape[-1] - 1, -1, -1)
+    return digits @ weights
+
+
+def ts_labels(dims):
+    # Labels of all 3**dims codes, e.g. 'win-lose' for dims=2
+    return np.array(['-'.join(p) for p in itertools.product(OUTCOMES, repeat=dims)])
+
+
+def ts_classify(data):
+    """
+    Classify every row of `data` (rows × dimensions).
+
+    Returns:
+        - ts_results: DataFrame with the Categories found (in order of first
+          appearance), their number of Results and summed Euclidean Magnitude
+        - rows: DataFrame with the 'TS' category and 'Euclidean' magnitude of
+          each row, indexed like `data`
+    """
+    values = np.asarray(data, dtype=float)
+    dims = values.shape[1]
+    codes = ts_codes(values)
+    euclidean = np.sqrt(np.nansum(values ** 2, axis=1))
+
+    counts = np.bincount(codes, minlength=3 ** dims)
+    magnitude = np.bincount(codes, weights=euclidean, minlength=3 ** dims)
+    _, first = np.unique(codes, return_index=True)
+    present = codes[np.sort(first)]
+
+    labels = ts_labels(dims)
+    ts_results = pd.DataFrame({'Categories': labels[present],
+                               'Results': counts[present],
+                               'Magnitude': magnitude[present]})
+    rows = pd.DataFrame({'TS': labels[codes], 'Euclidean': euclidean},
+                        index=getattr(data, 'index', None))
+    return ts_results, rows
+
+
+def ts_pairwise(values):
+    """
+    Classify every pair of columns of `values` at once.
+
+    values: sectors × regions (one indicator) or sectors × regions ×
+    indicators array of harmonized changes.
+
+    Returns (counts, magnitude), both indicators × regions × regions × 9
+    arrays: [k, a, b, c] is the number of sectors (and their summed
+    Euclidean magnitude) of category ts_labels(2)[c] when region a is the
+    first dimension and region b the second. The diagonal compares each
+    region with itself.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    if values.ndim == 2:
+        values = values[:, :, None]
+    n, R, k = values.shape
+    digits = (np.sign(values) + 1).astype(np.int64)
+
+    # n × R × R × k codes and magnitudes of all pairs, by broadcasting
+    codes = 3 * digits[:, :, None, :] + digits[:, None, :, :]
+    euclidean = np.sqrt(values[:, :, None, :] ** 2 + values[:, None, :, :] ** 2)
+    cell = (np.arange(k) * R * R + np.arange(R)[:, None, None] * R
+            + np.arange(R)[:, None]) * 9
+    bins = (cell[None] + codes).ravel()
+
+    size = k * R * R * 9
+    counts = np.bincount(bins, minlength=size).reshape(k, R, R, 9)
+    magnitude = np.bincount(bins, weights=euclidean.ravel(), minlength=size)
+    return counts, magnitude.reshape(k, R, R, 9)
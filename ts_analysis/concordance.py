@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+
+Sparse concordance aggregation.
+
+The aggregation workbook (e.g. exiobase_aggregated.xlsx) maps every
+original Region, Sector, Consumption category, Factor of production and
+Satellite account to its aggregated label. The mappings are compiled once
+per database axis into sparse 0/1 concordance matrices C (aggregated ×
+original), so aggregating a flow matrix M is C_rows @ M @ C_columns.T.
+Compiled concordances are persisted, so switching between alternative
+aggregations (e.g. EU/LAC/RoW vs. the full 49 regions) needs no re-parsing.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ts_analysis.cache import CACHE_DIR, cache_key, labels_from_json, labels_to_json
+
+LEVELS = ['Factor of production', 'Satellite account', 'Consumption category',
+          'Region', 'Sector']
+
+# Row and column axis of each flow matrix; None for the (Region, Level,
+# Item) axes of products and final demand categories
+AXES = {
+    'Z': (None, None),
+    'Y': (None, None),
+    'X': (None, 'column'),
+    'V': ('Factor of production', None),
+    'E': ('Satellite account', None),
+    'EY': ('Satellite account', None),
+}
+
+
+class Concordance:
+    """
+    Aggregation mappings ({level: Series original -> aggregated label}).
+    Levels without a mapping are kept as they are.
+    """
+
+    def __init__(self, mappings, folder=None):
+        self.mappings = mappings
+        self.folder = folder
+        self._compiled = {}
+
+    @classmethod
+    def from_excel(cls, path, levels=LEVELS):
+        sheets = pd.read_excel(path, sheet_name=list(levels), index_col=0)
+        return cls({level: df['Aggregation'].dropna() for level, df in sheets.items()})
+
+    def _map(self, level, labels):
+        labels = pd.Series(labels)
+        if level not in self.mappings:
+            return labels
+        mapped = labels.map(self.mappings[level])
+        return mapped.where(mapped.notna(), labels)
+
+    def _aggregated_labels(self, index, level):
+        if not isinstance(index, pd.MultiIndex):
+            return pd.Index(self._map(level, index), name=index.name)
+        # (Region, Level, Item): items are mapped with the sheet of their Level
+        regions = self._map('Region', index.get_level_values(0))
+        levels = pd.Series(index.get_level_values(1))
+        items = pd.Series(index.get_level_values(2))
+        for lvl in levels.unique():
+            mask = (levels == lvl).to_numpy()
+            items[mask] = self._map(lvl, items[mask]).to_numpy()
+        return pd.MultiIndex.from_arrays([regions, levels, items], names=index.names)
+
+    def compile(self, index, level=None):
+        """
+        Sparse concordance matrix (aggregated × original) and aggregated
+        labels for one database axis, compiled once per set of labels.
+        """
+        key = hashlib.sha1(
+            json.dumps(labels_to_json(index), default=str).encode()).hexdigest()
+        if key not in self._compiled:
+            codes, labels = pd.factorize(self._aggregated_labels(index, level))
+            C = sparse.csr_matrix(
+                (np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                shape=(len(labels), len(codes)))
+            if isinstance(index, pd.MultiIndex):
+                labels = pd.MultiIndex.from_tuples(labels, names=index.names)
+            else:
+                labels = pd.Index(labels, name=index.name)
+            self._compiled[key] = (C, labels)
+        return self._compiled[key]
+
+    def aggregate(self, matrices):
+        """
+        Aggregate flow matrices ({'Z', 'Y', 'V', 'E', 'EY', 'X'}, baseline or
+        scenario) with sparse-dense products. When Z and Y are given, the
+        production X and the coefficients z, v and e are recalculated from
+        the aggregated flows.
+        """
+        out = {}
+        for name, M in matrices.items():
+            row_level, col_level = AXES[name]
+            M = M.to_frame() if isinstance(M, pd.Series) else M
+            C_r, rows = self.compile(M.index, row_level)
+            values = C_r @ M.to_numpy(dtype=float)
+            columns = M.columns
+            if col_level != 'column':
+                C_c, columns = self.compile(M.columns, col_level)
+                values = (C_c @ values.T).T
+            out[name] = pd.DataFrame(values, index=rows, columns=columns)
+
+        if 'Z' in out and 'Y' in out:
+            X = out['Z'].sum(axis=1) + out['Y'].sum(axis=1)
+            out['X'] = X.to_frame('production')
+            inv_X = np.divide(1, X.to_numpy(), out=np.zeros(len(X)), where=X.to_numpy() != 0)
+            for flow, coefficient in [('Z', 'z'), ('V', 'v'), ('E', 'e')]:
+                if flow in out:
+                    out[coefficient] = out[flow] * inv_X
+        return out
+
+    def aggregate_units(self, units):
+        # {level: DataFrame with a 'unit' column}, first unit of each group
+        out = {}
+        for level, df in units.items():
+            groups = self._map(level, df.index).to_numpy()
+            out[level] = df.groupby(groups, sort=False).first()
+        return out
+
+    def save(self, folder=None):
+        """
+        Persist the mappings and every compiled concordance matrix. Every
+        file is written next to its final name and renamed into place, and
+        compiled.json (the index of the matrices, merged with the one on
+        disk) comes last, so processes sharing the folder never read a
+        half-written entry.
+        """
+        folder = Path(folder or self.folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        compiled = {}
+        if (folder / 'compiled.json').exists():
+            with open(folder / 'compiled.json') as f:
+                compiled = json.load(f)
+        for key, (C, labels) in self._compiled.items():
+            if key not in compiled:
+                _write(folder / f'{key}.npz', lambda path: sparse.save_npz(path, C))
+                compiled[key] = labels_to_json(labels)
+        mappings = {level: m.to_dict() for level, m in self.mappings.items()}
+        _write(folder / 'mappings.json', lambda path: _dump(mappings, path))
+        _write(folder / 'compiled.json', lambda path: _dump(compiled, path))
+
+    @classmethod
+    def load(cls, folder):
+        folder = Path(folder)
+        with open(folder / 'mappings.json') as f:
+            mappings = {level: pd.Series(m) for level, m in json.load(f).items()}
+        concordance = cls(mappings, folder=folder)
+        with open(folder / 'compiled.json') as f:
+            for key, labels in json.load(f).items():
+                concordance._compiled[key] = (sparse.load_npz(folder / f'{key}.npz'),
+                                              labels_from_json(labels))
+        return concordance
+
+
+def _dump(obj, path):
+    with open(path, 'w') as f:
+        json.dump(obj, f)
+
+
+def _write(path, write):
+    # write(tmp) next to path, then an atomic rename over it
+    tmp = path.with_name(f'{path.stem}.{os.getpid()}.tmp{path.suffix}')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def cached_concordance(path, levels=LEVELS, cache_dir=CACHE_DIR):
+    """
+    Concordance of an aggregation workbook, read from Excel only the first
+    time (or when the workbook changes) and loaded from cache_dir afterwards.
+    Call save() once its matrices are compiled (i.e. after aggregating) to
+    persist them with the mappings.
+    """
+    folder = Path(cache_dir) / 'concordance' / cache_key([path], extra=list(levels))
+    if (folder / 'compiled.json').exists():
+        return Concordance.load(folder)
+    concordance = Concordance.from_excel(path, levels)
+    concordance.folder = folder
+    return concordance
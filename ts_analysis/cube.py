@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+
+Dense result cube of harmonized changes.
+
+norm_new (a (Region, Item) × Indicator DataFrame per scenario) is stored
+once as a contiguous region × sector × indicator × scenario array with a
+label -> position map per axis. Selections along any axis are basic NumPy
+indexing, so single labels, ranges and evenly spaced label lists are
+zero-copy views instead of MultiIndex lookups, copies and unstacks. The
+geo, imp and sec analyses of ts_analysis.dimensions accept a cube in place
+of norm_new.
+"""
+
+import numpy as np
+import pandas as pd
+
+AXES = ('Region', 'Item', 'Indicator', 'Scenario')
+
+
+class ResultCube:
+    """
+    values: region × sector × indicator × scenario array
+    labels: {axis: labels} for the four AXES
+    """
+
+    def __init__(self, values, labels):
+        self.values = np.ascontiguousarray(values, dtype=float)
+        self.labels = {axis: pd.Index(labels[axis], name=axis) for axis in AXES}
+        self.positions = {axis: {label: i for i, label in enumerate(self.labels[axis])}
+                          for axis in AXES}
+        if self.values.shape != tuple(len(self.labels[axis]) for axis in AXES):
+            raise ValueError(f'values of shape {self.values.shape} do not match the labels')
+
+    @classmethod
+    def from_frame(cls, data, scenario='CE scenario'):
+        """
+        Cube of norm_new, or of {scenario: norm_new}. Region/sector
+        combinations missing from a frame are set to 0 (a tie).
+        """
+        frames = data if isinstance(data, dict) else {scenario: data}
+        first = next(iter(frames.values()))
+        # Labels in the order of the frame rows, so to_frame restores norm_new
+        regions = first.index.get_level_values('Region').unique()
+        items = first.index.get_level_values('Item').unique()
+        indicators = first.columns
+        index = pd.MultiIndex.from_product([regions, items], names=['Region', 'Item'])
+        values = np.stack([
+            df.reindex(index=index, columns=indicators).fillna(0).to_numpy(dtype=float)
+            for df in frames.values()], axis=-1)
+        return cls(values.reshape(len(regions), len(items), len(indicators), len(frames)),
+                   {'Region': regions, 'Item': items, 'Indicator': indicators,
+                    'Scenario': list(frames)})
+
+    def to_frame(self, scenario=None):
+        """norm_new of one scenario (the first by default)."""
+        scenario = self.labels['Scenario'][0] if scenario is None else scenario
+        values = self.values[..., self.positions['Scenario'][scenario]]
+        index = pd.MultiIndex.from_product([self.labels['Region'], self.labels['Item']])
+        return pd.DataFrame(values.reshape(len(index), -1), index=index,
+                            columns=self.labels['Indicator'].rename(None))
+
+    def _key(self, axis, labels):
+        # Integer for a label, slice for a label list whenever possible
+        positions = self.positions[axis]
+        if labels is None:
+            return slice(None)
+        if not isinstance(labels, (list, tuple, pd.Index, np.ndarray)):
+            return positions[labels]
+        p = np.array([positions[label] for label in labels], dtype=np.int64)
+        if len(p) == 1:
+            return slice(p[0], p[0] + 1)
+        step = p[1] - p[0]
+        if step > 0 and np.all(np.diff(p) == step):
+            return slice(p[0], p[-1] + 1, step)
+        return p  # Fancy indexing (copy) for unevenly spaced labels
+
+    def sel(self, **labels):
+        """
+        Array selection by label, e.g. sel(Region='EU footprint',
+        Indicator=['Value Added', 'GHG']). A single label drops its axis;
+        the remaining axes keep the AXES order.
+        """
+        keys = [self._key(axis, labels.get(axis)) for axis in AXES]
+        values = self.values
+        # Fancy keys are applied one axis at a time so they never combine
+        for i in reversed(range(len(AXES))):
+            if isinstance(keys[i], np.ndarray):
+                values = values.take(keys[i], axis=i)
+                keys[i] = slice(None)
+        return values[tuple(keys)]
+
+    def scenario(self, name):
+        """Cube of one scenario (a view)."""
+        i = self.positions['Scenario'][name]
+        return ResultCube(self.values[..., i:i + 1],
+                          {**self.labels, 'Scenario': [name]})
+
+    def table(self, rows, columns, **labels):
+        """
+        2-D DataFrame (a view when possible) of `rows` × `columns` axes,
+        e.g. table('Item', 'Region', Region=[...], Indicator='GHG'). Other
+        axes must be selected with one label, the only scenario is taken
+        when there is one.
+        """
+        if 'Scenario' not in labels and len(self.labels['Scenario']) == 1:
+            labels['Scenario'] = self.labels['Scenario'][0]
+        values = self.sel(**labels)
+        kept = [axis for axis in AXES
+                if not isinstance(self._key(axis, labels.get(axis)), (int, np.integer))]
+        if sorted(kept) != sorted([rows, columns]):
+            raise ValueError(f'select one label of every axis but {rows} and {columns}')
+        if kept != [rows, columns]:
+            values = values.T
+
+        def axis_labels(axis):
+            selected = labels.get(axis)
+            return self.labels[axis] if selected is None else pd.Index(selected, name=axis)
+
+        return pd.DataFrame(values, index=axis_labels(rows), columns=axis_labels(columns),
+                            copy=False)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+
+Geographical, impact and sectoral trade-offs and synergies (pure compute).
+
+These functions only return the results; drawing them is left to
+ts_analysis.plots, so batch runs never touch matplotlib.
+
+`data` follows the structure of norm_new in ts_analysis_v3.0.py: harmonized
+relative changes (%) with a (Region, Item) index and one column per
+indicator, or a ts_analysis.cube.ResultCube of it (sliced without copies).
+"""
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis.classify import ts_classify, ts_labels, ts_pairwise
+from ts_analysis.cube import ResultCube
+
+
+def geo(data, country_list, impact):
+    """
+    Geographical trade-offs and synergies of `impact` between the regions in
+    country_list. Returns (ts_results, grouped, total).
+    """
+    if isinstance(data, ResultCube):
+        # Sorted sectors as unstack gives them, sorted totals as groupby
+        grouped = data.table('Item', 'Region', Item=sorted(data.labels['Item']),
+                             Region=list(country_list), Indicator=impact)
+        total = grouped.sum().sort_index().rename(impact)
+    else:
+        df_geo = data.loc[pd.IndexSlice[country_list, :], impact]
+        # Group by country and sector, then unstack (in country_list order,
+        # which pandas drops when every region of data is selected)
+        grouped = df_geo.unstack(level='Region')[list(country_list)]
+        # Total of all sectors for each country
+        total = df_geo.groupby('Region').sum()
+    # Win/lose/tie category and Euclidean magnitude of each sector,
+    # counted and summed per category
+    ts_results, _ = ts_classify(grouped)
+    return ts_results, grouped, total
+
+
+def geo_pairs(data, impact_list, country_list=None):
+    """
+    Geographical trade-offs and synergies between every pair of regions in
+    country_list (all regions of data by default) for each impact, in one
+    vectorized pass. Returns a DataFrame indexed by (Indicator, Region A,
+    Region B) with the number of sectors (Results) and summed Euclidean
+    Magnitude of every category (Region A first, e.g. 'win-lose').
+    """
+    if isinstance(data, ResultCube):
+        if country_list is None:
+            country_list = list(data.labels['Region'])
+        scenario = data.labels['Scenario'][0]
+        values = data.sel(Region=country_list, Indicator=impact_list, Scenario=scenario)
+        values = values.transpose(1, 0, 2)  # sectors × regions × impacts
+    else:
+        if country_list is None:
+            country_list = list(data.index.unique(level='Region'))
+        df_geo = data.loc[pd.IndexSlice[country_list, :], impact_list]
+        values = df_geo.unstack(level='Region').reindex(
+            columns=pd.MultiIndex.from_product([impact_list, country_list])).to_numpy(dtype=float)
+        values = values.reshape(len(values), len(impact_list), len(country_list))
+        values = values.transpose(0, 2, 1)  # sectors × regions × impacts
+    counts, magnitude = ts_pairwise(values)
+
+    labels = ts_labels(2)
+    index = pd.MultiIndex.from_product([impact_list, country_list, country_list],
+                                       names=['Indicator', 'Region A', 'Region B'])
+    columns = pd.MultiIndex.from_product([['Results', 'Magnitude'], labels])
+    size = len(index)
+    return pd.DataFrame(
+        np.hstack([counts.reshape(size, 9), magnitude.reshape(size, 9)]),
+        index=index, columns=columns).astype({('Results', c): int for c in labels})
+
+
+def imp(data, impact_list, country):
+    """
+    Impact trade-offs and synergies among the indicators in impact_list for
+    one footprint region. Returns (ts_results, df_imp, total).
+    """
+    if isinstance(data, ResultCube):
+        df_imp = data.table('Item', 'Indicator', Region=country, Indicator=impact_list)
+        df_imp.index = pd.MultiIndex.from_product([[country], df_imp.index],
+                                                  names=['Region', 'Item'])
+        df_imp.columns.name = None
+    else:
+        df_imp = data.loc[pd.IndexSlice[country, :], impact_list]
+    ts_results, _ = ts_classify(df_imp)
+    # Total of all sectors for each impact
+    total = df_imp.sum()
+    return ts_results, df_imp, total
+
+
+def sec(data, sector_list, impact):
+    """
+    Sectoral trade-offs and synergies of `impact` between the sectors in
+    sector_list across regions. Returns (ts_results, grouped, total).
+    """
+    if isinstance(data, ResultCube):
+        # Sorted regions as unstack gives them, sorted totals as groupby
+        grouped = data.table('Region', 'Item', Region=sorted(data.labels['Region']),
+                             Item=list(sector_list), Indicator=impact)
+        total = grouped.sum().sort_index().rename(impact)
+    else:
+        df_sec = data.loc[pd.IndexSlice[:, sector_list], impact]
+        grouped = df_sec.unstack(level='Item')[list(sector_list)]
+        # Total of all regions for each sector
+        total = df_sec.groupby('Item').sum()
+    ts_results, _ = ts_classify(grouped)
+    return ts_results, grouped, total
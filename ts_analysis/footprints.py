@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+
+Batched footprint calculation.
+
+The per-sector footprint of an indicator with intensities m for a final
+demand vector y is diag(m) @ L @ y = m * (L @ y). Instead of building one
+n×n diagonal matrix and one dense matrix product per indicator, the
+intensities are stacked into a k×n multiplier matrix and every indicator,
+final-demand region and scenario is obtained in one broadcasted product
+over the production vectors L @ y.
+
+At full EXIOBASE detail, chunked_footprints streams Leontief inverses
+written by write_inverse (column-major memory maps) in column blocks that
+fit a memory budget, optionally in float32 with a reported error bound.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis.solver import production
+
+
+def intensity_matrix(v, e, indicators):
+    """
+    Stack the rows of the factor of production (v) and satellite account (e)
+    intensity matrices named in `indicators` into a k×n multiplier matrix.
+    """
+    rows = []
+    for indicator in indicators:
+        if indicator in v.index:
+            rows.append(v.loc[indicator, :])
+        elif indicator in e.index:
+            rows.append(e.loc[indicator, :])
+        else:
+            raise KeyError(f"'{indicator}' is neither in v nor in e")
+    return pd.DataFrame(rows, index=pd.Index(indicators, name='Indicator'))
+
+
+def regional_demand(Y, regions):
+    # One final demand column per region (consumption categories summed up)
+    Y_reg = Y.T.groupby(level=0, sort=False).sum().T
+    return Y_reg.loc[:, list(regions)]
+
+
+def batched_footprints(M, L, Y, regions):
+    """
+    Per-sector footprints of all indicators × regions × scenarios.
+
+    M: k×n multiplier matrix (see intensity_matrix)
+    L: {scenario: Leontief inverse or LeontiefSolver of (I - A)}
+    Y: {scenario: final demand matrix}
+    regions: final demand regions to evaluate (e.g. ['EU', 'LAC'])
+
+    Returns an n-row DataFrame with (Scenario, Indicator, Region) columns,
+    so that footprints['baseline', 'Value Added', 'EU'] equals
+    np.diag(va) @ L_bau @ Y_bau.loc[:, 'EU'].
+    """
+    scenarios = list(L)
+    index = L[scenarios[0]].index
+    M_ = M.reindex(columns=index).to_numpy(dtype=float)
+
+    # Production vectors for every scenario and region: S×n×R
+    X = np.empty((len(scenarios), len(index), len(regions)))
+    for s, scenario in enumerate(scenarios):
+        y = regional_demand(Y[scenario], regions).reindex(index)
+        X[s] = production(L[scenario], y.to_numpy(dtype=float))
+
+    # Broadcast intensities over production vectors: S×k×n×R
+    F = M_[None, :, :, None] * X[:, None, :, :]
+
+    columns = pd.MultiIndex.from_product(
+        [scenarios, M.index, list(regions)],
+        names=['Scenario', 'Indicator', 'Region'])
+    F = F.transpose(2, 0, 1, 3).reshape(len(index), -1)
+    return pd.DataFrame(F, index=index, columns=columns)
+
+
+def write_inverse(L, path, dtype=np.float64, block=512):
+    """
+    Write the Leontief inverse of a solver (LeontiefSolver or
+    IncrementalSolver) to a column-major .npy file, one block of `block`
+    columns at a time, so the full inverse is never held in memory.
+    Returns the file as a read-only memory map.
+    """
+    n = len(L.index) if getattr(L, 'index', None) is not None else L.n
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n, n),
+                                    fortran_order=True)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        identity = np.zeros((n, stop - start))
+        identity[np.arange(start, stop), np.arange(stop - start)] = 1
+        out[:, start:stop] = production(L, identity)
+    out.flush()
+    del out
+    return np.load(path, mmap_mode='r')
+
+
+def blocked_production(L, Y, memory=2 ** 28, dtype=np.float64, check=None):
+    """
+    x = L @ Y streaming L (e.g. a memory map from write_inverse) in column
+    blocks that fit in `memory` bytes. With dtype=np.float32 the blocks
+    are multiplied in single precision and summed in double precision.
+
+    Returns (x, bound, error): `bound` is the element-wise error bound
+    gamma * (|L| @ |Y|), gamma = m*u / (1 - m*u) with m = b + 2 for blocks
+    of b columns (the 2 covers rounding L and Y) and u the unit roundoff of
+    the lower precision of dtype and L, and `error` the largest relative
+    error of the rows in `check` (positions) against float64. Both are None
+    when everything is float64.
+    """
+    n = L.shape[1]
+    Y = np.asarray(Y, dtype=float)
+    itemsize = np.dtype(dtype).itemsize
+    b = int(max(1, min(n, memory // (2 * L.shape[0] * max(itemsize, L.dtype.itemsize)))))
+    precision = max(np.finfo(dtype).eps, np.finfo(L.dtype).eps)  # Machine epsilon
+    single = precision > np.finfo(np.float64).eps
+    Y_c = Y.astype(dtype)
+    Y_abs = np.abs(Y_c)
+    negative = (Y < 0).any()
+
+    x = np.zeros((L.shape[0],) + Y.shape[1:])
+    x_abs = np.zeros_like(x) if single and negative else None
+    x_check = np.zeros((len(check),) + Y.shape[1:]) if single and check is not None else None
+    for start in range(0, n, b):
+        block = np.asarray(L[:, start:start + b])
+        block_c = block.astype(dtype, copy=False)
+        x += block_c @ Y_c[start:start + b]
+        if x_abs is not None:
+            x_abs += block_c @ Y_abs[start:start + b]
+        if x_check is not None:
+            x_check += block[check].astype(np.float64) @ Y[start:start + b]
+
+    if not single:
+        return x, None, None
+    u = precision / 2
+    gamma = (b + 2) * u / (1 - (b + 2) * u)
+    bound = gamma * (x if x_abs is None else x_abs)
+    error = None
+    if x_check is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = np.nanmax(np.abs(x[check] - x_check) / np.abs(x_check))
+    return x, bound, error
+
+
+def chunked_footprints(M, L, Y, regions, index, memory=2 ** 28, dtype=np.float64,
+                       check=0, seed=None):
+    """
+    batched_footprints for Leontief inverses too large for memory.
+
+    L: {scenario: n×n array, ideally a column-major memory map written by
+    write_inverse}; index: labels of the n sectors. L is streamed in column
+    blocks of at most `memory` bytes. With dtype=np.float32 the footprints
+    come with a report of the float32 error: the largest relative bound
+    ('bound', valid for nonnegative L) and the largest relative error of
+    `check` random rows against float64 ('error').
+
+    Returns (footprints, report).
+    """
+    scenarios = list(L)
+    M_ = M.reindex(columns=index).to_numpy(dtype=float)
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(index), size=min(check, len(index)), replace=False)) \
+        if check else None
+
+    F = np.empty((len(scenarios), len(M_), len(index), len(regions)))
+    report = {'dtype': np.dtype(dtype).name, 'bound': None, 'error': None}
+    for s, scenario in enumerate(scenarios):
+        y = regional_demand(Y[scenario], regions).reindex(index).to_numpy(dtype=float)
+        x, bound, error = blocked_production(L[scenario], y, memory, dtype, rows)
+        F[s] = M_[:, :, None] * x[None]
+        if bound is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                relative = np.nan_to_num(bound / np.abs(x), posinf=0)
+            report['bound'] = max(report['bound'] or 0, float(relative.max()))
+        if error is not None:
+            report['error'] = max(report['error'] or 0, float(error))
+
+    columns = pd.MultiIndex.from_product(
+        [scenarios, M.index, list(regions)],
+        names=['Scenario', 'Indicator', 'Region'])
+    F = F.transpose(2, 0, 1, 3).reshape(len(index), -1)
+    return pd.DataFrame(F, index=index, columns=columns), report
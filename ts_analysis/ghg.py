@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+
+GHG extensions from EXIOBASE satellite accounts.
+
+EXIOBASE extension files (e.g. air_emissions/F.txt) hold hundreds of
+stressor rows × 9,800 region-sector columns, of which only the ~9 GHG rows
+are needed. read_stressors filters the rows while streaming the file, so
+discarded rows are never decoded nor kept in memory, and only the kept
+rows are parsed by pandas' C engine.
+"""
+
+import io
+
+import pandas as pd
+
+
+def read_stressors(path, stressors, header_rows=2, chunk=1 << 24):
+    """
+    Read the rows of an EXIOBASE extension file (F.txt, F_Y.txt) whose
+    stressor name is in `stressors`, keeping its multi-level header.
+    """
+    prefixes = tuple(f'{name}\t'.encode() for name in stressors)
+    kept = io.BytesIO()
+    with open(path, 'rb', buffering=chunk) as f:
+        for _ in range(header_rows):
+            kept.write(f.readline())
+        for line in f:
+            if line.startswith(prefixes):
+                kept.write(line)
+    kept.seek(0)
+    return pd.read_csv(kept, sep='\t', index_col=[0],
+                       header=list(range(header_rows)), engine='c')
+
+
+def read_characterization(path):
+    """
+    Characterization factors as a metric × stressor matrix (one row per
+    metric, e.g. 'GWP100 AR6', one column per EXIOBASE stressor).
+    """
+    return pd.read_csv(path, index_col=0)
+
+
+def characterize(F, Q):
+    """
+    Apply all metrics of Q (metric × stressor) to F (stressor × columns)
+    in one matrix product. Stressors missing from F count as zero.
+    """
+    F_ = F.reindex(Q.columns).fillna(0)
+    return pd.DataFrame(Q.to_numpy(dtype=float) @ F_.to_numpy(dtype=float),
+                        index=Q.index, columns=F.columns)
+
+
+def extension_columns(columns, level):
+    # (region, sector) EXIOBASE columns as MARIO (Region, Level, Item) labels
+    return pd.MultiIndex.from_tuples(
+        [(region, level, item) for region, item in columns],
+        names=['Region', 'Level', 'Item'])
+
+
+def write_extension(E, path, EY=None, unit='kg CO2 eq.'):
+    """
+    Write a labeled extension workbook in the layout of new_E_extension.xlsx,
+    ready for exiobase.add_extensions(matrix='E'): the E sheet (metric ×
+    region-sector), an optional EY sheet for household emissions (metric ×
+    region-consumption category) and the units sheet.
+    """
+    sheets = {'E': E.set_axis(extension_columns(E.columns, 'Sector'), axis=1)}
+    if EY is not None:
+        sheets['EY'] = EY.set_axis(
+            extension_columns(EY.columns, 'Consumption category'), axis=1)
+
+    with pd.ExcelWriter(path) as writer:
+        for name, df in sheets.items():
+            header = df.columns.to_frame(index=False).T
+            body = df.set_axis(range(df.shape[1]), axis=1)
+            pd.concat([header, body]).to_excel(writer, sheet_name=name, header=False)
+        units = pd.DataFrame({'unit': unit}, index=E.index)
+        units.to_excel(writer, sheet_name='units')
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+
+Harmonization of footprints into norm_new.
+
+The relative change (%) of every sector's scenario footprint against the
+baseline total of its final-demand region is computed for all indicators
+and regions at once on the S×n×k×R footprint array, oriented so that a
+positive value is always a win (the sign of "lower is better" indicators,
+such as GHG emissions, is changed) and summed per sector with one sparse
+product. Adding a region is a config change: one more column of the
+batched footprints, not another harmonization block.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Database indicator: (norm_new column, higher is better)
+INDICATORS = {
+    'Value Added': ('Value Added', True),
+    'Employment (people)': ('Employment', True),
+    'GHG emissions': ('GHG', False),
+}
+
+
+def harmonize(fp, indicators=INDICATORS, regions=None, scenario='CE scenario',
+              baseline='baseline', suffix=' footprint'):
+    """
+    norm_new from batched footprints (see footprints.batched_footprints).
+
+    fp: n-row DataFrame with (Scenario, Indicator, Region) columns and a
+        (Region, Level, Item) index
+    indicators: {database indicator: (norm_new column, higher is better)}
+    regions: final-demand regions, all regions of fp by default
+
+    Returns a DataFrame with a (Region, Item) index ('EU footprint', ...),
+    sectors sorted by name, and one column per indicator.
+    """
+    if regions is None:
+        regions = list(fp.columns.unique(level='Region'))
+    names = list(indicators)
+    labels = [indicators[name][0] for name in names]
+    direction = np.where([indicators[name][1] for name in names], 1.0, -1.0)
+
+    # n×k×R footprints of both scenarios
+    columns = pd.MultiIndex.from_product([names, regions])
+    bau = fp[baseline].reindex(columns=columns).to_numpy(dtype=float)
+    ce = fp[scenario].reindex(columns=columns).to_numpy(dtype=float)
+    n, k, R = len(fp.index), len(names), len(regions)
+    bau, ce = bau.reshape(n, k, R), ce.reshape(n, k, R)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        norm = (ce - bau) / bau.sum(axis=0) * 100
+    norm[np.isnan(norm)] = 0  # Replace resulting NaN values with zeros
+    norm *= direction[None, :, None]
+
+    # Sum the rows of each sector (countries of the aggregated regions)
+    codes, items = pd.factorize(fp.index.get_level_values('Item'), sort=True)
+    G = sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(len(items), n))
+    agg = (G @ norm.reshape(n, -1)).reshape(len(items), k, R)
+
+    index = pd.MultiIndex.from_product(
+        [[region + suffix for region in regions], items], names=['Region', 'Item'])
+    return pd.DataFrame(agg.transpose(2, 0, 1).reshape(R * len(items), k),
+                        index=index, columns=labels)
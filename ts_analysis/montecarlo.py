@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+
+Monte Carlo uncertainty of the trade-offs and synergies.
+
+Every draw perturbs the shock values (relative normal noise on each row of
+the z and Y sheets), the intensities of the indicators (mean-preserving
+lognormal noise) and, optionally, the GWP factors used to build the GHG
+intensities from single-gas stressors. Draws are evaluated in batches as
+array operations on the baseline Leontief inverse L:
+
+    x_ce = x0 + (L U) (I - (L U)[C])^-1 x0[C],   x0 = L (y + dy)
+
+with U the changed columns C of each draw's dA (a batched Woodbury update),
+so a batch costs one stacked product with L. The harmonized cube of each
+batch only updates streaming statistics: mean and standard deviation
+(parallel Welford update), quantiles from a fixed-size reservoir sample,
+and the frequency of every category of every analysis row. Draws are never
+kept in memory.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ts_analysis import shocks
+from ts_analysis.classify import ts_codes, ts_labels
+from ts_analysis.footprints import regional_demand
+from ts_analysis.harmonize import INDICATORS
+
+
+class RunningStats:
+    """Mean and variance of batches of draws (parallel Welford update)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, batch):
+        b = len(batch)
+        mean = batch.mean(axis=0)
+        m2 = ((batch - mean) ** 2).sum(axis=0)
+        if not self.n:
+            self.n, self.mean, self.m2 = b, mean, m2
+            return
+        n = self.n + b
+        delta = mean - self.mean
+        self.mean = self.mean + delta * b / n
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * b / n
+        self.n = n
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / max(self.n - 1, 1))
+
+
+class Reservoir:
+    """Uniform sample of at most `size` draws (algorithm R) for quantiles."""
+
+    def __init__(self, size=1000, rng=None):
+        self.size = size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.seen = 0
+        self.sample = None
+
+    def update(self, batch):
+        if self.sample is None:
+            self.sample = np.empty((self.size,) + batch.shape[1:])
+        t = self.seen + np.arange(len(batch))
+        slot = np.where(t < self.size, t, self.rng.integers(0, t + 1))
+        keep = slot < self.size
+        self.sample[slot[keep]] = batch[keep]  # Later draws win, as in sequence
+        self.seen += len(batch)
+
+    def quantiles(self, q):
+        return np.quantile(self.sample[:min(self.seen, self.size)], q, axis=0)
+
+
+def _shocked_cells(matrix, rows, cols, kinds, values, noise, scale=None):
+    # {(i, j): draws of the shocked cell} applying the shock rows in order
+    new = {}
+    for s, (i, j, kind) in enumerate(zip(rows, cols, kinds)):
+        current = new.get((i, j), matrix[i, j])
+        new[i, j] = shocks._shocked(current, kind, values[s] * noise[:, s],
+                                    1.0 if scale is None else scale[j])
+    return new
+
+
+def _selections(analyses, regions, items, labels):
+    # Positions in the (draw, region, sector, indicator) cube of each analysis:
+    # {name: (values(cube) -> draws × rows × dims, row labels, dims)}
+    region_pos = {region: i for i, region in enumerate(regions)}
+    item_pos = {item: i for i, item in enumerate(items)}
+    label_pos = {label: i for i, label in enumerate(labels)}
+    out = {}
+    for name, (dimension, selection, label) in analyses.items():
+        if dimension == 'geo':
+            r = [region_pos[region] for region in selection]  # As in dimensions.geo
+            k = label_pos[label]
+            out[name] = (lambda cube, r=r, k=k: cube[..., k][:, r].transpose(0, 2, 1),
+                         pd.Index(items, name='Item'), len(r))
+        elif dimension == 'imp':
+            r = region_pos[label]
+            k = [label_pos[impact] for impact in selection]
+            out[name] = (lambda cube, r=r, k=k: cube[:, r][:, :, k],
+                         pd.Index(items, name='Item'), len(k))
+        else:
+            i = [item_pos[item] for item in selection]
+            k = label_pos[label]
+            out[name] = (lambda cube, i=i, k=k: cube[:, :, i, k],
+                         pd.Index(regions, name='Region'), len(i))
+    return out
+
+
+def monte_carlo(w, z, Y, X, M, shock, analyses, draws=1000, regions=('EU', 'LAC'),
+                indicators=INDICATORS, shock_sd=0.1, intensity_sd=0.05, gwp=None,
+                e=None, ghg='GHG emissions', batch=250, reservoir=1000,
+                quantiles=(0.05, 0.5, 0.95), seed=None, suffix=' footprint'):
+    """
+    Streaming Monte Carlo of the harmonized results and their classification.
+
+    w: baseline Leontief inverse; z, Y, X: baseline coefficients, final
+    demand and production; M: intensity matrix (see intensity_matrix) with
+    one row per indicator; shock: see shocks.read_shock; analyses: see
+    pipeline.default_analyses.
+    shock_sd: relative standard deviation of every shock value
+    intensity_sd: lognormal sigma of every intensity
+    gwp: {stressor row of e: (factor, standard deviation)}; when given, the
+        `ghg` intensities are rebuilt from e with sampled factors per draw
+
+    Returns {'draws', 'mean', 'std', 'quantiles': {q: DataFrame},
+    'probabilities': {analysis: rows × categories DataFrame}}, with the
+    norm_new layout for the statistics of the harmonized changes.
+    """
+    rng = np.random.default_rng(seed)
+    regions = list(regions)
+    names = list(indicators)
+    labels = [indicators[name][0] for name in names]
+    direction = np.where([indicators[name][1] for name in names], 1.0, -1.0)
+
+    index = w.index
+    n, R, k = len(index), len(regions), len(names)
+    L = np.asarray(w, dtype=float)
+    M_ = M.loc[names].reindex(columns=index).to_numpy(dtype=float)
+    z_, Y_ = z.to_numpy(dtype=float), Y.to_numpy(dtype=float)
+    X_ = np.asarray(X, dtype=float).ravel()
+    Yr = regional_demand(Y, regions).reindex(index).to_numpy(dtype=float)
+    x_bau = L @ Yr
+
+    positions = shocks.shock_positions(z, Y, shock)
+    C = np.unique(positions['z'][1])
+    column = {j: c for c, j in enumerate(C)}
+    y_region = [regions.index(region) if region in regions else -1
+                for region in Y.columns.get_level_values(0)]
+
+    if gwp:
+        stressors = e.loc[list(gwp)].reindex(columns=index).to_numpy(dtype=float)
+        factors = np.array([gwp[s] for s in gwp], dtype=float)
+
+    codes, items = pd.factorize(index.get_level_values('Item'), sort=True)
+    G = sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(len(items), n))
+    footprints = [region + suffix for region in regions]
+    selections = _selections(analyses, footprints, list(items), labels)
+
+    stats = RunningStats()
+    sample = Reservoir(reservoir, rng)
+    counts = {}
+    done = 0
+    while done < draws:
+        D = min(batch, draws - done)
+
+        # Shocked coefficients and final demand of every draw
+        noise = 1 + shock_sd * rng.standard_normal((D, len(shock['z'])))
+        U = np.zeros((D, n, len(C)))
+        for (i, j), value in _shocked_cells(z_, *positions['z'], shock['z']['type'],
+                                            shock['z']['value'].to_numpy(), noise, X_).items():
+            U[:, i, column[j]] += value - z_[i, j]
+        noise = 1 + shock_sd * rng.standard_normal((D, len(shock['Y'])))
+        dY = np.zeros((D, n, R))
+        for (i, j), value in _shocked_cells(Y_, *positions['Y'], shock['Y']['type'],
+                                            shock['Y']['value'].to_numpy(), noise).items():
+            if y_region[j] >= 0:
+                dY[:, i, y_region[j]] += value - Y_[i, j]
+
+        # Batched Woodbury update of the baseline inverse
+        x_ce = x_bau + L @ dY
+        if len(C):
+            LU = L @ U
+            K = np.eye(len(C)) - LU[:, C, :]
+            x_ce = x_ce + LU @ np.linalg.solve(K, x_ce[:, C, :])
+
+        # Sampled intensities (D × k × n)
+        M_d = np.broadcast_to(M_, (D, k, n)).copy()
+        if gwp:
+            f = factors[:, 0] + factors[:, 1] * rng.standard_normal((D, len(factors)))
+            M_d[:, names.index(ghg)] = f @ stressors
+        M_d *= np.exp(intensity_sd * rng.standard_normal((D, k, n)) - intensity_sd ** 2 / 2)
+
+        # Harmonization (D × k × n × R), summed per sector: D × R × items × k
+        bau = M_d[..., None] * x_bau
+        with np.errstate(divide='ignore', invalid='ignore'):
+            norm = (M_d[..., None] * x_ce[:, None] - bau) / bau.sum(axis=2, keepdims=True) * 100
+        norm[np.isnan(norm)] = 0
+        norm *= direction[None, :, None, None]
+        agg = G @ norm.transpose(2, 0, 1, 3).reshape(n, -1)
+        cube = agg.reshape(len(items), D, k, R).transpose(1, 3, 0, 2)
+
+        stats.update(cube)
+        sample.update(cube)
+        for name, (select, rows, dims) in selections.items():
+            values = select(cube)
+            cells = 3 ** dims
+            flat = np.arange(values.shape[1]) * cells + ts_codes(values)
+            counts[name] = counts.get(name, 0) + np.bincount(
+                flat.ravel(), minlength=len(rows) * cells).reshape(len(rows), cells)
+        done += D
+
+    index = pd.MultiIndex.from_product([footprints, items], names=['Region', 'Item'])
+
+    def frame(values):
+        return pd.DataFrame(values.reshape(len(index), k), index=index, columns=labels)
+
+    probabilities = {}
+    for name, (_, rows, dims) in selections.items():
+        p = pd.DataFrame(counts[name] / draws, index=rows, columns=ts_labels(dims))
+        probabilities[name] = p.loc[:, p.any()]
+    return {'draws': draws, 'mean': frame(stats.mean), 'std': frame(stats.std),
+            'quantiles': {q: frame(v) for q, v in zip(quantiles, sample.quantiles(quantiles))},
+            'probabilities': probabilities}
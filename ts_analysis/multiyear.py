@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+
+Multi-year time series of the trade-offs and synergies.
+
+Every year is an EXIOBASE folder (config['path_template'], e.g.
+IOT_{year}_ixi_v3.9.5 for 1995-2022) running its own chain: GHG
+characterization of the year's air emissions into an extension workbook,
+then the load, extend, aggregate (cached per year, see ts_analysis.cache),
+shock, footprint, harmonize and classify stages. Years run in a process
+pool of at most `processes` workers, each worker handling one year and
+exiting afterwards, so at most `processes` databases are in memory at
+once (memory_per_year caps the workers to the memory available). Results
+are written as soon as a year completes, into one year-partitioned set:
+
+    out/norm_new/year=<year>/part-0.parquet: Region, Item, indicators
+    out/classification/year=<year>/part-0.parquet: analysis, Categories,
+                                                   Results, Magnitude
+    out/reports/year=<year>/: run report of the year (ts_analysis.profiling)
+
+Workers are spawned, so scripts calling run need the
+`if __name__ == '__main__':` guard.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+TABLES = ['norm_new', 'classification']
+
+
+def year_config(config, year):
+    """Pipeline settings of one year (database folder and GHG extension)."""
+    config = {**config, 'path_exio': config['path_template'].format(year=year),
+              'norm': None, 'reports': str(Path(config['out']) / 'reports' / f'year={year}')}
+    if config['factors']:
+        config['path_extensions'] = str(ghg_extension(config, year))
+    return config
+
+
+def ghg_extension(config, year):
+    """
+    GHG extension workbook of a year ('GHG emissions' in the metric
+    config['ghg_metric']), written once to the cache folder under the
+    content hash of the year's F.txt and of the factors of the metric.
+    """
+    from ts_analysis import ghg
+    from ts_analysis.cache import cache_key
+
+    factors = ghg.read_characterization(config['factors']).loc[[config['ghg_metric']]]
+    stressors = Path(config['path_exio']) / 'air_emissions' / 'F.txt'
+    key = cache_key([stressors], factors.iloc[0].to_dict())
+    path = Path(config['cache_dir']) / 'extensions' / f'{year}_{key}.xlsx'
+    if not path.exists():
+        F = ghg.read_stressors(stressors, factors.columns)
+        E = ghg.characterize(F, factors).set_axis(['GHG emissions'], axis=0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp.xlsx')
+        ghg.write_extension(E, tmp)
+        os.replace(tmp, path)  # Never a half-written workbook for the next run
+    return path
+
+
+def run_year(year, config):
+    """
+    Run the chain of one year. Returns (year, norm_new, classification
+    summary).
+    """
+    from ts_analysis.pipeline import Pipeline
+
+    pipeline = Pipeline(year_config(config, year))
+    results = pipeline.run(['harmonize', 'classify'])
+    summary = []
+    for name, (_, (ts_results, _, _), _) in results['classify'].items():
+        summary.append(ts_results.assign(analysis=name))
+    return year, results['harmonize'], pd.concat(summary, ignore_index=True)
+
+
+def available_memory():
+    """Physical memory available in bytes (None where it is unknown)."""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def workers(years, processes=None, memory_per_year=None):
+    """Number of workers: processes (default: CPUs) capped by years and memory."""
+    count = min(len(years), processes or os.cpu_count() or 1)
+    memory = available_memory() if memory_per_year else None
+    if memory is not None:
+        count = min(count, max(1, memory // memory_per_year))
+    return count
+
+
+def _write(out, year, norm_new, summary):
+    paths = []
+    for table, df in zip(TABLES, [norm_new.reset_index(), summary]):
+        path = Path(out) / table / f'year={year}' / 'part-0.parquet'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def run(config, years, out, processes=None, memory_per_year=None):
+    """
+    Run every year of `years` with the pipeline settings `config` and write
+    the results to `out` as the years complete. With a single worker the
+    years run in this process, one after another. Returns the paths.
+    """
+    config = {**config, 'out': str(out)}
+    years = list(years)
+    paths = []
+    count = workers(years, processes, memory_per_year)
+    if count == 1:
+        for year in years:
+            paths += _write(out, *run_year(year, config))
+        return paths
+    with ProcessPoolExecutor(max_workers=count, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_year, year, config) for year in years]
+        for future in as_completed(futures):
+            paths += _write(out, *future.result())
+    return paths
+
+
+def read_years(out, table='norm_new'):
+    """
+    One table of all years written by run, with a leading Year level
+    (norm_new: Year, Region, Item rows; classification: Year, analysis).
+    """
+    df = pd.read_parquet(Path(out) / table)
+    df['year'] = df['year'].astype(int)
+    df = df.rename(columns={'year': 'Year'}).sort_values('Year', kind='stable')
+    keys = ['Year', 'Region', 'Item'] if table == 'norm_new' else ['Year', 'analysis']
+    return df.set_index(keys)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+
+Search of intervention portfolios over a declared intervention space.
+
+An intervention space is {parameter: (low, high)} over the parameters of
+shocks.parametrize: a Legend of the main sheet (its value) or a
+'sheet:row sector' group of shock rows (an intensity multiplying their
+values, 0 switching the intervention off). By default it is the
+Sensitivity rows of the main sheet (Min to Max) or, without them, every
+'sheet:row sector' group from 0 to 2 times the workbook values.
+
+Candidate portfolios are sampled in the space and scored with the
+linearization of norm_new around the workbook scenario: the Jacobian with
+respect to the parameters comes from the adjoint derivatives of
+ts_analysis.sensitivity, so a batch of portfolios is one matrix product.
+For every footprint region, the candidates are scored by the region's
+Value Added, Employment and GHG changes (the totals of ts_imp, higher is
+better for all three after harmonization) and by the magnitude of its
+win-win-win sectors, candidates with a loss beyond max_loss in any
+indicator are dropped, and the Pareto frontier of the three changes is
+kept (its `size` candidates with the largest win-win magnitude). These are
+then evaluated exactly (incremental Woodbury solves, as in the sweeps) and
+the frontier is recomputed from the exact values.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis import footprints, sensitivity, shocks
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.incremental import IncrementalSolver
+
+
+def intervention_space(shock, high=2.0):
+    """Default space: Sensitivity rows of the main sheet, else sector groups."""
+    main = shock['main']
+    sensitive = main[main['Sensitivity'].astype(str).str.lower().isin(['yes', 'true', '1'])]
+    if len(sensitive):
+        return {row['Legend']: (float(row['Min']), float(row['Max']))
+                for _, row in sensitive.iterrows()}
+    return {f'{sheet}:{sector}': (0.0, high)
+            for sheet in ['z', 'Y'] for sector in shock[sheet]['row sector'].unique()}
+
+
+def jacobian(derivatives, shock, space):
+    """
+    Values of the parameters of `space` in the workbook scenario and the
+    Jacobian of norm_new with respect to them (parameters × norm_new), from
+    the derivatives with respect to the shock values (see
+    sensitivity.sensitivity).
+    """
+    legends = shock['main'].set_index('Legend')['Value']
+    values = np.concatenate([shock[sheet]['value'].to_numpy(dtype=float) for sheet in ['z', 'Y']])
+    p0, rows = [], []
+    for name in space:
+        if name in legends.index:
+            # The shock values of the Legend all take the parameter value
+            weights = np.concatenate([shock[sheet]['legend'] == name for sheet in ['z', 'Y']])
+            p0.append(float(legends[name]))
+            weights = weights.astype(float)
+        else:
+            # Intensity: the shock values of the rows scale with the parameter
+            matrix, _, sector = name.partition(':')
+            if matrix not in ['z', 'Y'] or not (shock[matrix]['row sector'] == sector).any():
+                raise KeyError(f"'{name}' is neither a Legend nor a 'sheet:row sector' "
+                               "of the shock")
+            weights = np.concatenate([(shock[sheet]['row sector'] == sector) & (sheet == matrix)
+                                      for sheet in ['z', 'Y']]) * values
+            p0.append(1.0)
+        rows.append(weights @ derivatives.to_numpy())
+    return np.array(p0), pd.DataFrame(rows, index=list(space), columns=derivatives.columns)
+
+
+def pareto(F):
+    """Mask of the rows of F (candidates × objectives) that no other row dominates."""
+    F = np.asarray(F, dtype=float)
+    # In descending lexicographic order a row can only be dominated by earlier
+    # rows, and then by one of the earlier non-dominated ones
+    order = np.lexsort(-F.T[::-1])
+    front = np.empty((0, F.shape[1]))
+    keep = np.zeros(len(F), dtype=bool)
+    for i in order:
+        f = F[i]
+        if ((front >= f).all(axis=1) & (front > f).any(axis=1)).any():
+            continue
+        keep[i] = True
+        front = np.vstack([front, f])
+    return keep
+
+
+def _scores(cells, items, k):
+    # Region totals (N × R × k) and win-win magnitude (N × R) of norm_new values
+    # in the (Region, Item, Indicator) order of the sensitivity columns
+    values = cells.reshape(len(cells), -1, items, k)
+    totals = values.sum(axis=2)
+    win = (values > 0).all(axis=3)
+    magnitude = (np.sqrt((values ** 2).sum(axis=3)) * win).sum(axis=2)
+    return totals, magnitude
+
+
+def _frontiers(totals, magnitude, max_loss, size):
+    # Per region, the Pareto mask of the candidates within the loss bound,
+    # keeping the `size` of them with the largest win-win magnitude
+    masks = np.zeros((totals.shape[1], len(totals)), dtype=bool)
+    for r in range(totals.shape[1]):
+        feasible = np.arange(len(totals)) if max_loss is None else \
+            np.flatnonzero((totals[:, r] >= -max_loss).all(axis=1))
+        front = feasible[pareto(totals[feasible, r])]
+        masks[r, front[np.argsort(-magnitude[front, r], kind='stable')[:size]]] = True
+    return masks
+
+
+def optimize(z, Y, X, M, shock, L_bau, L_ce, space=None, draws=10000, regions=('EU', 'LAC'),
+             indicators=INDICATORS, max_loss=None, size=50, refine=True, batch=10000, seed=None,
+             scenario='CE scenario'):
+    """
+    Pareto frontiers of intervention portfolios per footprint region.
+
+    z, Y, X: baseline coefficients, final demand and production; M:
+    intensity matrix; shock: see shocks.read_shock; L_bau, L_ce: baseline
+    and scenario solvers (or Leontief inverses); space: {parameter: (low, high)}, see
+    intervention_space; max_loss: largest loss (in % of the baseline
+    footprint, i.e. the most negative harmonized total) allowed in any
+    indicator; size: frontier candidates kept per region (those with the
+    largest win-win magnitude); refine: evaluate them exactly.
+
+    Returns a DataFrame with one row per region and frontier candidate:
+    Region, the parameter values, the indicator changes, 'Win-win
+    magnitude' and 'Exact' (whether the values come from an exact run).
+    The workbook scenario is candidate 0.
+    """
+    rng = np.random.default_rng(seed)
+    regions = list(regions)
+    space = space or intervention_space(shock)
+    names = list(space)
+    labels = [indicators[name][0] for name in indicators]
+    k = len(labels)
+
+    norm_new, derivatives = sensitivity.sensitivity(
+        z, Y, X, M, shock, L_bau, L_ce, regions, indicators)
+    items = len(derivatives.columns.unique(level='Item'))
+    p0, J = jacobian(derivatives, shock, space)
+    cells0 = norm_new.stack(future_stack=True).reindex(derivatives.columns).to_numpy()
+
+    # Sampled portfolios (the workbook scenario first), scored in batches
+    low, high = np.array([space[name] for name in names], dtype=float).T
+    P = np.vstack([p0, low + (high - low) * rng.random((draws, len(names)))])
+    totals = np.empty((len(P), len(regions), k))
+    magnitude = np.empty((len(P), len(regions)))
+    for start in range(0, len(P), batch):
+        cells = cells0 + (P[start:start + batch] - p0) @ J.to_numpy()
+        totals[start:start + batch], magnitude[start:start + batch] = \
+            _scores(cells, items, k)
+    masks = _frontiers(totals, magnitude, max_loss, size)
+    exact = np.zeros(len(P), dtype=bool)
+
+    if refine:
+        candidates = np.flatnonzero(masks.any(axis=0))
+        for c in candidates:
+            variant = shocks.parametrize(shock, dict(zip(names, P[c])))
+            dA, Y_ce = shocks.shock_delta(z, Y, X, variant)
+            fp = footprints.batched_footprints(
+                M, {'baseline': L_bau, scenario: IncrementalSolver(L_bau, dA)},
+                {'baseline': Y, scenario: Y_ce}, regions)
+            values = harmonize(fp, indicators, regions, scenario).stack(future_stack=True)
+            totals[c], magnitude[c] = _scores(
+                values.reindex(derivatives.columns).to_numpy()[None], items, k)
+        exact[candidates] = True
+        refined = _frontiers(totals[candidates], magnitude[candidates], max_loss, size)
+        masks = np.zeros_like(masks)
+        masks[:, candidates] = refined
+
+    frames = []
+    for r, region in enumerate(derivatives.columns.unique(level='Region')):
+        c = np.flatnonzero(masks[r])
+        df = pd.DataFrame(P[c], columns=names)
+        df[labels] = totals[c, r]
+        df['Win-win magnitude'] = magnitude[c, r]
+        df['Exact'] = exact[c]
+        df.insert(0, 'Candidate', c)
+        df.insert(0, 'Region', region)
+        frames.append(df.sort_values('Win-win magnitude', ascending=False))
+    return pd.concat(frames, ignore_index=True)
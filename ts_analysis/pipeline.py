@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+
+Lazily evaluated pipeline of the trade-offs and synergies framework.
+
+Stages (in order): load, extend, aggregate, shock, footprint, harmonize,
+classify, export. A stage only runs when its result is requested, and
+pulls the stages it depends on. Two stages are persisted:
+    - aggregate: the prepared database, through ts_analysis.cache
+      (load and extend only run when the cache misses)
+    - harmonize: norm_new, written to config['norm'] with the key of the
+      database (its cache key, or the fingerprint of a database set in
+      results['aggregate']), the shock workbook and the settings it was
+      computed from (see NORM_SETTINGS)
+so an analysis-only run (classify, export) reads norm_new from disk and
+never imports mario nor solves a scenario while the key still matches.
+Load and extend only run when aggregate pulls them (on a cache miss),
+even when run() is asked for every stage. Without incremental
+scenarios, the results of MARIO's shock_calc are memoized too (see
+ts_analysis.cache.ScenarioCache): an unchanged shock workbook and baseline
+skip the scenario solve. Every stage is timed (see ts_analysis.profiling)
+and run() writes a JSON run report.
+
+mario and matplotlib are only imported by the stages that need them.
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from ts_analysis import dimensions
+from ts_analysis.cube import ResultCube
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.profiling import Profiler
+
+STAGES = ['load', 'extend', 'aggregate', 'shock', 'footprint', 'harmonize',
+          'classify', 'export']
+# Stages only run through the cached stage they feed
+PULLED = {'load': 'aggregate', 'extend': 'aggregate'}
+# Settings norm_new depends on besides the database and the shock
+NORM_SETTINGS = ['regions', 'indicators', 'scenario', 'memory', 'dtype']
+
+DEFAULTS = {
+    # Database, extensions and aggregation
+    'path_exio': 'IOT_2020_ixi_v3.9.5',
+    'path_extensions': 'MARIO_Extensions&Aggregations/new_E_extension.xlsx',
+    'path_aggr': 'MARIO_Extensions&Aggregations/exiobase_aggregated.xlsx',
+    'levels': ['Factor of production', 'Satellite account',
+               'Consumption category', 'Region', 'Sector'],
+    'cache_dir': '.ts_cache',
+    # Multi-year runs (see ts_analysis.multiyear); without factors, every
+    # year uses path_extensions instead of its own GHG extension
+    'path_template': 'IOT_{year}_ixi_v3.9.5',
+    'factors': 'MARIO_Extensions&Aggregations/characterization_factors.csv',
+    'ghg_metric': 'GWP100 AR6',
+    # Scenario
+    'shock': 'MARIO_ce_scenario.xlsx',
+    'scenario': 'CE scenario',
+    'incremental': True,  # Woodbury update instead of MARIO's shock_calc
+    'max_rank': 50,
+    'scenario_cache': 2 ** 34,  # Bytes of cached shock_calc results, 0 to always recompute
+    'backend': 'dense',  # 'sparse' keeps z and the scenario z in sparse form
+    'method': 'auto',  # (I - A) solver: 'dense', 'sparse' (LU), 'power', 'gmres' or 'auto'
+    # Footprints and harmonization
+    'memory': None,  # Bytes per block of L for the chunked footprints, None for in-memory
+    'dtype': 'float64',  # 'float32' halves the chunked footprint memory and I/O
+    'check': 100,  # Rows checked against float64 in float32 runs
+    'regions': ['EU', 'LAC'],  # None for all final-demand regions
+    'indicators': INDICATORS,  # database name: (norm_new column, higher is better)
+    'norm': 'results/norm_new.parquet',
+    # Trade-offs and synergies
+    'country_list': ['EU footprint', 'LAC footprint'],
+    'impact_list': ['Value Added', 'Employment', 'GHG'],
+    'sector_list': ['P&N Fertilisers', 'Agriculture'],
+    # Export
+    'results': 'results',
+    'excel': False,
+    'figures': None,  # Folder for PNG figures, None to skip them
+    # Profiling (times and peak RSS of every stage are always recorded)
+    'profile': False,  # True also traces allocations, 'cprofile' adds a profile per stage
+    'reports': 'results/reports',  # Folder of the JSON run reports, None to skip them
+}
+
+
+def default_analyses(country_list, impact_list, sector_list):
+    """
+    Analyses run by the classify stage: {name: (dimension, selection, label)}
+    with the sheet names used by the save_*_res functions.
+    """
+    short = dict(zip(impact_list, ['va', 'emp', 'gwp']))
+    analyses = {}
+    for impact in impact_list:
+        analyses['geo_' + short[impact]] = ('geo', country_list, impact)
+    for country in country_list:
+        analyses['imp_' + country[:2].lower()] = ('imp', impact_list, country)
+    for impact in impact_list:
+        analyses['sec_' + short[impact]] = ('sec', sector_list, impact)
+    return analyses
+
+
+def classify(norm_new, analyses):
+    """
+    Run analyses ({name: (dimension, selection, label)}) on norm_new or its
+    ResultCube.
+    Returns {name: (dimension, (ts_results, data, total), label)}, the jobs
+    format of plots.render_figures.
+    """
+    functions = {'geo': dimensions.geo, 'imp': dimensions.imp, 'sec': dimensions.sec}
+    return {name: (dimension, functions[dimension](norm_new, selection, label), label)
+            for name, (dimension, selection, label) in analyses.items()}
+
+
+def export(results, store, scenario='CE scenario', excel=False, figures=None):
+    """
+    Write classified results to a ResultStore and, optionally, the dated
+    geo/imp/sec Excel workbooks and the figures (in the `figures` folder).
+    """
+    for name, (dimension, result, label) in results.items():
+        store.write(dimension, name, result, label, scenario)
+    if excel:
+        for dimension in ['geo', 'imp', 'sec']:
+            names = {name: dim for name, (dim, _, _) in results.items() if dim == dimension}
+            if names:
+                filename = (dimension + '_results_' + datetime.now().strftime('%Y%m%d')
+                            + '.xlsx')
+                store.to_excel(filename, names, scenario)
+    if figures:
+        from ts_analysis import plots
+        plots.render_figures(results, folder=figures)
+    return store
+
+
+class Pipeline:
+    """
+    Lazy pipeline: Pipeline(**config).get('harmonize') runs only what is
+    needed to obtain norm_new, and run(['classify', 'export']) reuses the
+    persisted norm_new instead of recomputing the upstream stages.
+    """
+
+    def __init__(self, config=None, **overrides):
+        self.config = {**DEFAULTS, **(config or {}), **overrides}
+        self.results = {}
+        self.requested = set()
+        self.database_key = None  # Cache key of the aggregated database
+        self.precision = None  # float32 error report of the chunked footprints
+        profile = self.config['profile']
+        self.profiler = Profiler(
+            memory=bool(profile), hook=None if isinstance(profile, bool) else profile,
+            folder=Path(self.config['reports'] or self.config['results']) / 'profiles')
+
+    def run(self, stages=STAGES):
+        self.requested = set(stages)
+        for stage in STAGES:
+            if stage in self.requested and PULLED.get(stage) not in self.requested:
+                self.get(stage)
+        if self.config['reports']:
+            name = 'run_' + self.profiler.started.strftime('%Y%m%d_%H%M%S') + '.json'
+            self.profiler.write(Path(self.config['reports']) / name, self.config)
+        return self.results
+
+    def get(self, stage):
+        if stage not in self.results:
+            with self.profiler.stage(stage):
+                self.results[stage] = getattr(self, '_' + stage)()
+        return self.results[stage]
+
+    def sweep(self, grid=None, out=None, processes=None):
+        """
+        Classification summaries of the shock variants of `grid` ({parameter:
+        values}, the Sensitivity rows of the shock workbook by default),
+        evaluated in parallel (see ts_analysis.sweep). Returns the summaries.
+        """
+        from ts_analysis import footprints, shocks, sweep
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        shock = shocks.read_shock(c['shock'])
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(c['indicators']))
+        baseline = sweep.share_baseline(exiobase.z, exiobase.Y, exiobase.X, M,
+                                        Path(c['cache_dir']) / 'sweep', w=exiobase.w)
+        out = out or Path(c['results']) / 'sweep'
+        regions = c['regions'] or list(exiobase.Y.columns.unique(level=0))
+        analyses = default_analyses(c['country_list'], c['impact_list'], c['sector_list'])
+        sweep.run(baseline, shock, sweep.parameter_grid(shock, grid), analyses, out,
+                  c['indicators'], regions, c['scenario'], processes)
+        return sweep.read_sweep(out)
+
+    def monte_carlo(self, draws=1000, **options):
+        """
+        Streaming Monte Carlo of norm_new and of the classification of the
+        default analyses (see ts_analysis.montecarlo for the options).
+        """
+        from ts_analysis import footprints, montecarlo, shocks
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(c['indicators']))
+        analyses = default_analyses(c['country_list'], c['impact_list'], c['sector_list'])
+        return montecarlo.monte_carlo(
+            exiobase.w, exiobase.z, exiobase.Y, exiobase.X, M, shocks.read_shock(c['shock']),
+            analyses, draws, c['regions'] or list(exiobase.Y.columns.unique(level=0)),
+            c['indicators'], e=exiobase.e, **options)
+
+    def years(self, years, out=None, processes=None, memory_per_year=None):
+        """
+        norm_new of every year of `years` (Year, Region, Item rows), each
+        year running its own chain in a process pool of at most `processes`
+        workers (see ts_analysis.multiyear). The classification summaries
+        are in multiyear.read_years(out, 'classification').
+        """
+        from ts_analysis import multiyear
+
+        out = out or Path(self.config['results']) / 'years'
+        multiyear.run(self.config, years, out, processes, memory_per_year)
+        return multiyear.read_years(out)
+
+    def sensitivity(self, top=5):
+        """
+        Derivatives of norm_new with respect to every z and Y value of the
+        shock workbook, from adjoint solves, and the `top` shock values
+        closest to flipping each norm_new value (see ts_analysis.sensitivity).
+        Returns {'norm_new', 'derivatives', 'flips'}.
+        """
+        from ts_analysis import footprints, sensitivity, shocks
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        systems = self.get('shock')
+        shock = shocks.read_shock(c['shock'])
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(c['indicators']))
+        norm_new, derivatives = sensitivity.sensitivity(
+            exiobase.z, exiobase.Y, exiobase.X, M, shock, systems['L']['baseline'],
+            systems['L'][c['scenario']], c['regions'] or list(exiobase.Y.columns.unique(level=0)),
+            c['indicators'])
+        return {'norm_new': norm_new, 'derivatives': derivatives,
+                'flips': sensitivity.flips(norm_new, derivatives, shock, top)}
+
+    def optimize(self, space=None, draws=10000, max_loss=None, size=50, refine=True,
+                 seed=None):
+        """
+        Pareto frontiers of intervention portfolios sampled in `space` per
+        footprint region (see ts_analysis.optimize).
+        """
+        from ts_analysis import footprints, optimize, shocks
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        systems = self.get('shock')
+        shock = shocks.read_shock(c['shock'])
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(c['indicators']))
+        return optimize.optimize(
+            exiobase.z, exiobase.Y, exiobase.X, M, shock, systems['L']['baseline'],
+            systems['L'][c['scenario']], space, draws,
+            c['regions'] or list(exiobase.Y.columns.unique(level=0)), c['indicators'],
+            max_loss, size, refine, seed=seed, scenario=c['scenario'])
+
+    def structural_paths(self, k=20, **budget):
+        """
+        Top-k supply chain paths of the change between baseline and scenario
+        for every indicator and final-demand region (see ts_analysis.spa for
+        the budget options).
+        """
+        from ts_analysis import backend, footprints, spa
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        systems = self.get('shock')
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(c['indicators']))
+        return spa.structural_paths(
+            backend.convert(exiobase.z, c['backend']), systems['dA'], M,
+            systems['Y']['baseline'], systems['Y'][c['scenario']],
+            c['regions'] or list(exiobase.Y.columns.unique(level=0)), k,
+            **{'method': c['method'], **budget})
+
+    def _load(self):
+        import mario
+
+        return mario.parse_exiobase(
+            table='IOT', unit='Monetary', path=self.config['path_exio'])
+
+    def _extend(self):
+        exiobase = self.get('load')
+        path = self.config['path_extensions']
+        units = pd.read_excel(path, sheet_name='units', index_col=[0], header=[0])
+        exiobase.add_extensions(io=path, units=units, matrix='E')
+        return exiobase
+
+    def _aggregate(self):
+        from ts_analysis import cache
+        from ts_analysis.concordance import cached_concordance
+
+        c = self.config
+
+        def build():
+            exiobase = self.get('extend')
+            concordance = cached_concordance(c['path_aggr'], c['levels'], c['cache_dir'])
+            matrices = concordance.aggregate(
+                {name: getattr(exiobase, name) for name in ['Z', 'Y', 'V', 'E', 'EY']})
+            units = concordance.aggregate_units(exiobase.units)
+            concordance.save()
+            return cache.build_database(matrices, units, name='EXIOBASE aggregated')
+
+        return cache.cached_database(build, cache_dir=c['cache_dir'], key=self._database_key())
+
+    def _database_key(self):
+        # Content hash of the database inputs, computed once per pipeline
+        from ts_analysis import cache
+
+        c = self.config
+        if self.database_key is None:
+            self.database_key = cache.cache_key(
+                [c['path_exio'], c['path_extensions'], c['path_aggr']],
+                {'levels': list(c['levels'])})
+        return self.database_key
+
+    def _norm_key(self):
+        # Key of norm_new: database, shock workbook and settings. A database
+        # set in results['aggregate'] (not built from the inputs) is keyed on
+        # its matrices
+        from ts_analysis import cache
+
+        c = self.config
+        if self.database_key is None and 'aggregate' in self.results:
+            database = self.results['aggregate']
+            database = cache.database_fingerprint(
+                {name: getattr(database, name) for name in ['z', 'Y', 'v', 'e']})
+        else:
+            database = self._database_key()
+        return cache.cache_key([c['shock']], {'database': database,
+                                              **{name: c[name] for name in NORM_SETTINGS}})
+
+    def _shock(self):
+        from ts_analysis import backend, shocks
+        from ts_analysis.incremental import scenario_solver
+        from ts_analysis.solver import LeontiefSolver
+
+        c = self.config
+        exiobase = self.get('aggregate')
+        z = backend.convert(exiobase.z, c['backend'])
+        L_bau = LeontiefSolver(z, method=c['method'])
+        if c['incremental']:
+            shock = shocks.read_shock(c['shock'])
+            dA, Y_ce = shocks.shock_delta(z, exiobase.Y, exiobase.X, shock)
+            L_ce = scenario_solver(L_bau, z, dA, max_rank=c['max_rank'], method=c['method'])
+        else:
+            Y_ce, z_ce, L_ce = self._shock_calc(exiobase)
+            z_ce = backend.convert(z_ce, c['backend'])
+            dA = backend.to_sparse(z_ce) - backend.to_sparse(z)
+        return {'L': {'baseline': L_bau, c['scenario']: L_ce},
+                'Y': {'baseline': exiobase.Y, c['scenario']: Y_ce}, 'dA': dA}
+
+    def _shock_calc(self, exiobase):
+        # MARIO's shock_calc, memoized in the scenario cache: Y, z and the
+        # Leontief inverse w of the scenario (memory-mapped on a cache hit)
+        from ts_analysis import cache
+
+        c = self.config
+        store = None
+        if c['scenario_cache']:
+            store = cache.ScenarioCache(Path(c['cache_dir']) / 'scenarios', c['scenario_cache'])
+            key = store.key(c['shock'], {'z': exiobase.z, 'Y': exiobase.Y, 'X': exiobase.X},
+                            {'Y': True, 'z': True})
+            matrices = store.get(key)
+            if matrices is not None:
+                return matrices['Y'], matrices['z'], matrices['w']
+
+        exiobase.shock_calc(io=c['shock'], Y=True, z=True, scenario=c['scenario'],
+                            force_rewrite=True)
+        matrices = {name: exiobase.matrices[c['scenario']][name] for name in ['Y', 'z', 'w']}
+        if store is not None:
+            store.put(key, matrices)
+        return matrices['Y'], matrices['z'], matrices['w']
+
+    def _footprint(self):
+        from ts_analysis import footprints
+
+        exiobase = self.get('aggregate')
+        systems = self.get('shock')
+        regions = self.config['regions']
+        if regions is None:
+            regions = list(exiobase.Y.columns.unique(level=0))
+        M = footprints.intensity_matrix(exiobase.v, exiobase.e, list(self.config['indicators']))
+        if not self.config['memory']:
+            return footprints.batched_footprints(M, systems['L'], systems['Y'], regions)
+
+        # Low-memory mode: inverses written to disk and streamed in blocks
+        c = self.config
+        folder = Path(c['cache_dir']) / 'inverse'
+        folder.mkdir(parents=True, exist_ok=True)
+        block = max(1, c['memory'] // (16 * len(exiobase.z)))
+        L = {scenario: footprints.write_inverse(solver, folder / f'{i}.npy', c['dtype'], block)
+             for i, (scenario, solver) in enumerate(systems['L'].items())}
+        fp, self.precision = footprints.chunked_footprints(
+            M, L, systems['Y'], regions, exiobase.z.index, c['memory'], c['dtype'], c['check'])
+        return fp
+
+    def _harmonize(self):
+        c = self.config
+        path = Path(c['norm']) if c['norm'] else None
+        upstream = self.requested & set(STAGES[:STAGES.index('harmonize')])
+        if path is not None:
+            key = self._norm_key()
+            keyfile = path.with_suffix('.key')
+            if path.exists() and keyfile.exists() and keyfile.read_text() == key \
+                    and 'harmonize' not in self.requested and not upstream:
+                return pd.read_parquet(path)
+
+        norm_new = harmonize(self.get('footprint'), c['indicators'], c['regions'],
+                             c['scenario'])
+        if path is not None:
+            # The key is written last: an interrupted write never looks valid
+            path.parent.mkdir(parents=True, exist_ok=True)
+            keyfile.unlink(missing_ok=True)
+            norm_new.to_parquet(path)
+            keyfile.write_text(key)
+        return norm_new
+
+    def _classify(self):
+        c = self.config
+        analyses = default_analyses(c['country_list'], c['impact_list'], c['sector_list'])
+        # One contiguous cube shared by all analyses
+        cube = ResultCube.from_frame(self.get('harmonize'), c['scenario'])
+        return classify(cube, analyses)
+
+    def _export(self):
+        from ts_analysis.store import ResultStore
+
+        c = self.config
+        return export(self.get('classify'), ResultStore(c['results']), c['scenario'],
+                      excel=c['excel'], figures=c['figures'])
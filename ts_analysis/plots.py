@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+
+Figures of the geographical, impact and sectoral analyses.
+
+plot_geo, plot_imp and plot_sec draw the pie, scatter and total figures
+from the results of ts_analysis.dimensions and return them without showing
+them. render_figures writes figures to PNG/SVG/PDF files in a process pool
+on the non-interactive Agg backend, so batch runs never block on GUI
+windows. matplotlib is only imported when a figure is drawn.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+def _pie(ts_results, title):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(8, 8))  # Set the size of the figure
+    plt.pie(ts_results['Magnitude'], labels=ts_results['Categories'],
+            autopct='%1.1f%%', startangle=140)  # Plot the pie chart
+    plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+    plt.title(title)
+    return fig
+
+
+def _scatter(grouped, title):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    grouped.plot(kind='scatter', x=grouped.columns[0], y=grouped.columns[1],
+                 ax=ax)
+    # Set axis limits
+    ax.set_xlim(-1, 1)
+    ax.set_ylim(-1, 1)
+
+    # Hide the top and right spines
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    # Set the position of the remaining spines to cross at (0,0)
+    ax.spines['bottom'].set_position(('data', 0))
+    ax.spines['left'].set_position(('data', 0))
+
+    ax.set_title(title, fontsize=14, pad=20, loc='center', va='top')
+    return fig
+
+
+def _total(total, title, colors, xlim, text_xy):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    total.plot(kind='barh', stacked=True, ax=ax, linewidth=50, color=colors)
+
+    ax.set_title(title, fontsize=14, pad=20, loc='center', va='top')
+    ax.set_xlabel('Relative change (%)')
+    ax.set_xlim(-xlim, xlim)
+    # Add text annotations
+    x, y = text_xy
+    ax.text(x, y, 'Win', fontsize=24, ha='center', va='center', color='blue')
+    ax.text(-x, y, 'Lose', fontsize=24, ha='center', va='center', color='red')
+    return fig
+
+
+def plot_geo(ts_results, grouped, total, impact):
+    return [
+        _pie(ts_results, 'Geographical trade-off and synergies distribution '
+             'by categories for ' + str(impact)),
+        _scatter(grouped, 'Geographical trade-off and synergies for ' +
+                 str(impact) + ' (in relative changes, %)'),
+        _total(total, 'Geographical trade-off and synergies for ' + str(impact),
+               ['C0', 'C1'], 10.0, (8.75, 1.3))]
+
+
+def plot_imp(ts_results, df_imp, total, country):
+    import matplotlib.pyplot as plt
+
+    pie = _pie(ts_results, 'Impact trade-off and synergies distribution '
+               'by categories for ' + str(country))
+
+    # 3D scatter plot
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    ax.scatter(df_imp.iloc[:, 0], df_imp.iloc[:, 1], df_imp.iloc[:, 2])
+
+    # Set axis limits
+    ax.set_xlim(-1, 1)
+    ax.set_ylim(-1, 1)
+    ax.set_zlim(-1, 1)
+
+    # Hide the top and right spines
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    # Set the position of the remaining spines to cross at (0,0,0)
+    ax.spines['bottom'].set_position(('data', 0))
+    ax.spines['left'].set_position(('data', 0))
+    ax.spines['top'].set_position(('data', 0))
+
+    # Add lines representing each axis intersecting at (0,0,0)
+    ax.plot([-1, 1], [0, 0], [0, 0], color='k', linestyle='-', linewidth=1, zorder=1)  # X-axis
+    ax.plot([0, 0], [-1, 1], [0, 0], color='k', linestyle='-', linewidth=1, zorder=1)  # Y-axis
+    ax.plot([0, 0], [0, 0], [-1, 1], color='k', linestyle='-', linewidth=1, zorder=1)  # Z-axis
+
+    ax.set_title('Impacts trade-off and synergies in ' + str(country),
+                 fontsize=14, pad=20, loc='center', va='top')
+    ax.set_xlabel(df_imp.columns[0])
+    ax.set_ylabel(df_imp.columns[1])
+    ax.set_zlabel(df_imp.columns[2])
+
+    bars = _total(total, 'Impacts trade-off and synergies in ' + str(country),
+                  ['C0', 'C1', 'C2'], 10, (8.75, 3.0))
+    return [pie, fig, bars]
+
+
+def plot_sec(ts_results, grouped, total, impact):
+    return [
+        _pie(ts_results, 'Sectoral trade-off and synergies distribution '
+             'by categories for ' + str(impact)),
+        _scatter(grouped, 'Sectoral trade-off and synergies for ' +
+                 str(impact) + ' (in relative changes, %)'),
+        _total(total, 'Sectoral trade-off and synergies for ' + str(impact),
+               ['C0', 'C1'], 1.0, (0.75, 1.3))]
+
+
+PLOTS = {'geo': plot_geo, 'imp': plot_imp, 'sec': plot_sec}
+FIGURES = ['pie', 'scatter', 'total']
+
+
+def _render(job):
+    # Runs in a worker process: draw one analysis and save its figures
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    name, kind, results, label, folder, formats = job
+    paths = []
+    for figure, fig in zip(FIGURES, PLOTS[kind](*results, label)):
+        for fmt in formats:
+            path = Path(folder) / f'{name}_{figure}.{fmt}'
+            fig.savefig(path, format=fmt, bbox_inches='tight')
+            paths.append(str(path))
+        plt.close(fig)
+    return paths
+
+
+def render_figures(jobs, folder='figures', formats=('png',), processes=None):
+    """
+    Save the figures of several analyses in parallel.
+
+    jobs: {name: (kind, results, label)}, with kind 'geo', 'imp' or 'sec',
+    results the tuple returned by the matching dimensions function and label
+    the impact (geo, sec) or footprint region (imp), e.g.
+    {'geo_va': ('geo', dimensions.geo(norm_new, countries, 'Value Added'), 'Value Added')}
+
+    Returns the paths written, e.g. figures/geo_va_pie.png.
+    """
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    tasks = [(name, kind, results, label, folder, tuple(formats))
+             for name, (kind, results, label) in jobs.items()]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return [path for paths in pool.map(_render, tasks) for path in paths]
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+
+Stage-level profiling of a pipeline run.
+
+Every stage records its wall and CPU time, the peak resident set size of
+the process (RSS, from the OS) and, with memory=True, the peak of the
+bytes allocated through Python (tracemalloc, which slows allocations
+down). Stages pull their dependencies, so records nest: the times of a
+stage include its dependencies and 'self_wall'/'self_cpu' exclude them.
+A profiler can be hooked per stage with `hook`: 'cprofile' dumps one
+cProfile file per outermost stage (including the stages it pulled), and
+any callable hook(stage) returning a context manager (e.g. starting and
+stopping a sampling profiler such as pyinstrument) is entered around the
+stage.
+
+The run report is a JSON file with the environment, the configuration
+and the stage records, meant to be compared across database versions and
+scenarios.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss():
+    """Peak resident set size of the process in bytes (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+
+class Profiler:
+    """
+    Records of the stages run inside `with profiler.stage(name):`.
+
+    memory: trace Python allocations (peak allocated bytes per stage)
+    hook: None, 'cprofile' or a callable stage -> context manager
+    folder: where the cProfile files are written
+    """
+
+    def __init__(self, memory=False, hook=None, folder='.'):
+        self.memory = memory
+        self.hook = hook
+        self.folder = Path(folder)
+        self.records = []
+        self.started = datetime.now()
+        self._stack = []  # Open stages: [name, nested wall, nested cpu, allocated peak]
+        self._tracing = False  # Whether tracemalloc was started here
+        self._profile = None  # Running cProfile (one at a time, nested stages included)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if self.memory:
+            # The peak is reset per stage, so keep the parent's peak so far
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append([name, 0.0, 0.0, 0])
+        rss = peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with self._hook(name):
+                yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            _, nested_wall, nested_cpu, allocated = self._stack.pop()
+            record = {'stage': name, 'parent': self._stack[-1][0] if self._stack else None,
+                      'wall': wall, 'cpu': cpu,
+                      'self_wall': wall - nested_wall, 'self_cpu': cpu - nested_cpu,
+                      'peak_rss': peak_rss(), 'rss_growth': None}
+            if rss is not None:
+                # ru_maxrss only grows: how much this stage raised the peak
+                record['rss_growth'] = record['peak_rss'] - rss
+            if self.memory:
+                allocated = max(allocated, tracemalloc.get_traced_memory()[1])
+                record['allocated_peak'] = allocated
+            if self._stack:
+                self._stack[-1][1] += wall
+                self._stack[-1][2] += cpu
+                self._stack[-1][3] = max(self._stack[-1][3], allocated)
+            self.records.append(record)
+
+    def _hook(self, name):
+        if self.hook is None:
+            return contextlib.nullcontext()
+        if self.hook == 'cprofile':
+            return self._cprofile(name)
+        return self.hook(name)
+
+    @contextlib.contextmanager
+    def _cprofile(self, name):
+        import cProfile
+
+        if self._profile is not None:
+            yield  # Profiled as part of the enclosing stage
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+            self.folder.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(self.folder / f'{name}.prof')
+            self._profile = None
+
+    def report(self, config=None):
+        """Run report: environment, configuration and stage records."""
+        import numpy as np
+        import pandas as pd
+
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'environment': {'python': platform.python_version(),
+                            'platform': platform.platform(), 'cpus': os.cpu_count(),
+                            'numpy': np.__version__, 'pandas': pd.__version__},
+            'config': config or {},
+            'stages': self.records,
+            'wall': sum(r['wall'] for r in self.records if r['parent'] is None),
+            'peak_rss': peak_rss(),
+        }
+
+    def write(self, path, config=None):
+        """Write the run report to a JSON file and return its path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(config), f, indent=2, default=str)
+        if self._tracing and not self._stack:
+            tracemalloc.stop()
+            self._tracing = False
+        return path
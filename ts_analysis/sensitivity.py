@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+
+Adjoint sensitivity of norm_new to the values of the shock workbook.
+
+Every norm_new value is a linear functional of the scenario production,
+
+    norm[r, item, k] = d_k * 100 * (c_item,k^T x_ce(r) - baseline) / F_k,r
+    c_item,k = m_k on the rows of the item, x_ce(r) = L_ce y_ce(r),
+
+with d_k the direction of the indicator and F_k,r the baseline footprint
+total. Its derivative with respect to a scenario coefficient is
+(L_ce^T c)_i x_ce(r)_j for z[i, j] and (L_ce^T c)_i for Y[i, j] of region
+r, so one transposed (adjoint) solve per item and indicator, all batched in
+one multi-column solve, gives the derivatives with respect to every z and
+Y shock value (chained through the Percentage/Absolute/Update rules and
+repeated shocks of the same cell) instead of one scenario run per value.
+
+flips ranks, for every norm_new value, the shock values whose linearized
+change to bring it to zero (a sign change: win <-> lose, which moves the
+sector to another trade-off/synergy category in every analysis using the
+value) is the smallest relative to the shock value itself.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ts_analysis import backend, shocks
+from ts_analysis.classify import OUTCOMES
+from ts_analysis.footprints import regional_demand
+from ts_analysis.harmonize import INDICATORS
+from ts_analysis.solver import production
+
+
+def _chain(matrix, rows, cols, kinds, values, scale=None):
+    # Derivative of the final value of every shocked cell with respect to each
+    # shock row, applying the rows of a cell in order (as shocks.shock_delta)
+    current, derivative = {}, np.zeros(len(rows))
+    for s, (i, j, kind, value) in enumerate(zip(rows, cols, kinds, values)):
+        cell = current.setdefault((i, j), [matrix[i, j], []])
+        x = cell[0]
+        if kind == 'Percentage':
+            d_value, d_current = x, 1 + value
+        elif kind == 'Absolute':
+            d_value, d_current = 1 / (1.0 if scale is None else scale[j]), 1.0
+        elif kind == 'Update':
+            d_value, d_current = 1.0, 0.0
+        else:
+            raise ValueError(f"Unknown shock type '{kind}'")
+        for t in cell[1]:
+            derivative[t] *= d_current
+        derivative[s] = d_value
+        cell[1].append(s)
+        cell[0] = shocks._shocked(x, kind, value, 1.0 if scale is None else scale[j])
+    return derivative
+
+
+def parameters(shock):
+    """Shock rows as (Sheet, Row) index with their description and value."""
+    frames = []
+    for sheet in ['z', 'Y']:
+        df = shock[sheet]
+        column = df['column sector'] if sheet == 'z' else df['demand category']
+        frames.append(pd.DataFrame({
+            'Sheet': sheet, 'Row': np.arange(len(df)),
+            'Parameter': (sheet + ': ' + df['row region'] + ' ' + df['row sector'] + ' -> '
+                          + df['column region'] + ' ' + column + ' (' + df['type'] + ')'),
+            'Shock value': df['value'].to_numpy(dtype=float)}))
+    return pd.concat(frames).set_index(['Sheet', 'Row'])
+
+
+def sensitivity(z, Y, X, M, shock, L_bau, L_ce, regions, indicators=INDICATORS,
+                suffix=' footprint'):
+    """
+    Derivatives of norm_new with respect to every z and Y shock value.
+
+    z, Y, X: baseline coefficients, final demand and production; M:
+    intensity matrix (see intensity_matrix); shock: see shocks.read_shock;
+    L_bau, L_ce: baseline and scenario solvers (or Leontief inverses).
+
+    Returns (norm_new, derivatives): norm_new as in harmonize, and the
+    derivatives with one row per shock row ((Sheet, Row) index, see
+    parameters) and one column per norm_new value ((Region, Item,
+    Indicator) columns).
+    """
+    regions = list(regions)
+    names = list(indicators)
+    labels = [indicators[name][0] for name in names]
+    direction = np.where([indicators[name][1] for name in names], 1.0, -1.0)
+    index = z.index
+    n, R, k = len(index), len(regions), len(names)
+
+    M_ = M.loc[names].reindex(columns=index).to_numpy(dtype=float)
+    _, Y_ce = shocks.shock_delta(z, Y, X, shock)
+    x_bau = production(L_bau, regional_demand(Y, regions).reindex(index).to_numpy(dtype=float))
+    x_ce = production(L_ce, regional_demand(Y_ce, regions).reindex(index).to_numpy(dtype=float))
+    total = M_ @ x_bau  # k × R baseline footprints
+    with np.errstate(divide='ignore'):
+        scale = np.where(total != 0, 100 * direction[:, None] / total, 0)
+
+    codes, items = pd.factorize(index.get_level_values('Item'), sort=True)
+    G = sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(len(items), n))
+    norm = (G @ (M_[:, :, None] * (x_ce - x_bau)[None]).transpose(1, 0, 2).reshape(n, -1))
+    norm = norm.reshape(len(items), k, R) * scale[None]
+
+    # Adjoint solves: one column per item and indicator (n × items·k)
+    C = (G.toarray()[:, None, :] * M_[None]).reshape(-1, n)
+    adjoint = production(L_ce, C.T, trans=True).reshape(n, len(items), k)
+
+    # Derivatives of every shocked cell with respect to its shock rows
+    positions = shocks.shock_positions(z, Y, shock)
+    z_ = backend.values(z)
+    X_ = np.asarray(X, dtype=float).ravel()
+    rows, cols = positions['z']
+    d_z = _chain(z_, rows, cols, shock['z']['type'], shock['z']['value'].to_numpy(), X_)
+    # z[i, j]: adjoint_i × x_ce(r)_j, for every item, indicator and region
+    D_z = (adjoint[rows][:, :, :, None] * x_ce[cols][:, None, None, :]
+           * d_z[:, None, None, None])
+
+    rows, cols = positions['Y']
+    d_Y = _chain(Y.to_numpy(dtype=float), rows, cols, shock['Y']['type'],
+                 shock['Y']['value'].to_numpy())
+    region = np.array([regions.index(r) if r in regions else -1
+                       for r in Y.columns.get_level_values(0)])[cols]
+    D_Y = np.zeros((len(rows), len(items), k, R))
+    inside = region >= 0
+    D_Y[inside, :, :, region[inside]] = adjoint[rows[inside]] * d_Y[inside, None, None]
+
+    D = np.concatenate([D_z, D_Y]) * scale[None, None]
+    columns = pd.MultiIndex.from_product([[r + suffix for r in regions], items, labels],
+                                         names=['Region', 'Item', 'Indicator'])
+    D = D.transpose(0, 3, 1, 2).reshape(len(D), -1)
+    norm_new = pd.DataFrame(norm.transpose(2, 0, 1).reshape(R * len(items), k),
+                            index=columns.droplevel('Indicator').unique(), columns=labels)
+    return norm_new, pd.DataFrame(D, index=parameters(shock).index, columns=columns)
+
+
+def flips(norm_new, derivatives, shock, top=5):
+    """
+    The `top` shock values closest to flipping each norm_new value, ranked by
+    the linearized relative change of the shock value that brings the value
+    to zero (|change to flip / shock value|; the absolute change for shock
+    values of zero). Values that no shock value moves are left out.
+    """
+    values = norm_new.stack(future_stack=True).reindex(derivatives.columns).to_numpy()
+    D = derivatives.to_numpy()
+    info = parameters(shock).reindex(derivatives.index)
+    v = info['Shock value'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(D != 0, -values[None] / D, np.inf)
+        relative = np.abs(change) / np.where(v != 0, np.abs(v), 1)[:, None]
+
+    order = np.argsort(relative, axis=0, kind='stable')[:top]
+    ranked = np.take_along_axis(relative, order, axis=0)
+    records = []
+    for c, (region, item, indicator) in enumerate(derivatives.columns):
+        for rank, (s, r) in enumerate(zip(order[:, c], ranked[:, c]), 1):
+            if not np.isfinite(r):
+                break
+            records.append({
+                'Region': region, 'Item': item, 'Indicator': indicator,
+                'Value': values[c], 'Outcome': OUTCOMES[int(np.sign(values[c])) + 1],
+                'Rank': rank, 'Parameter': info['Parameter'].iloc[s],
+                'Shock value': v[s], 'Derivative': D[s, c], 'Change to flip': change[s, c],
+                'Relative change': r})
+    return pd.DataFrame.from_records(records)
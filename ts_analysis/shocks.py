@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+
+Reading MARIO shock workbooks (e.g. MARIO_ce_scenario.xlsx) as sparse
+changes to the baseline technical coefficients (z) and final demand (Y).
+
+Shock types follow MARIO:
+    - Percentage: coefficient * (1 + value)
+    - Absolute: value added to the flow (for z, divided by the baseline
+      production of the demanding sector)
+    - Update: coefficient replaced by value
+
+Values can be a Legend of the 'main' sheet; the Legend is kept with each
+shock so that parametrize can set it (or scale groups of shocks) for
+sensitivity runs without reading the workbook again.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ts_analysis import backend
+
+Z_KEYS = ['row region', 'row level', 'row sector',
+          'column region', 'column level', 'column sector']
+Y_KEYS = ['row region', 'row level', 'row sector',
+          'column region', 'demand category']
+
+
+def read_shock(path):
+    """
+    Read the main, z and Y sheets of a shock workbook. Values given as a
+    Legend of the 'main' sheet are replaced by the Value defined there (the
+    Legend is kept in a 'legend' column).
+    """
+    sheets = pd.read_excel(path, sheet_name=['main', 'z', 'Y'])
+    main = sheets['main'].dropna(subset=['Legend']).reset_index(drop=True)
+    legend = main.set_index('Legend')['Value']
+
+    shock = {'main': main}
+    for matrix in ['z', 'Y']:
+        df = sheets[matrix].dropna(how='all').copy()
+        df['legend'] = [value if value in legend.index else None for value in df['value']]
+        df['value'] = [legend[value] if value in legend.index else value
+                       for value in df['value']]
+        df['value'] = df['value'].astype(float)
+        shock[matrix] = df.reset_index(drop=True)
+    return shock
+
+
+def parametrize(shock, parameters):
+    """
+    Copy of a shock with parameters ({name: value}) applied. A name is
+    either a Legend of the main sheet, whose shocks take the value, or
+    'sheet:row sector' (e.g. 'z:Organic composting'), whose shock values
+    are multiplied by the value (shock intensity).
+    """
+    shock = {key: df.copy() for key, df in shock.items()}
+    for name, value in parameters.items():
+        if name in set(shock['main']['Legend']):
+            for matrix in ['z', 'Y']:
+                df = shock[matrix]
+                df.loc[df['legend'] == name, 'value'] = float(value)
+            continue
+        matrix, _, sector = name.partition(':')
+        if matrix not in ['z', 'Y'] or not (shock[matrix]['row sector'] == sector).any():
+            raise KeyError(f"'{name}' is neither a Legend nor a 'sheet:row sector' of the shock")
+        df = shock[matrix]
+        df.loc[df['row sector'] == sector, 'value'] *= float(value)
+    return shock
+
+
+def _shocked(current, kind, value, scale=1.0):
+    if kind == 'Percentage':
+        return current * (1 + value)
+    if kind == 'Absolute':
+        return current + value / scale
+    if kind == 'Update':
+        return value
+    raise ValueError(f"Unknown shock type '{kind}'")
+
+
+def shock_positions(z, Y, shock):
+    """
+    Row and column positions of the z and Y shocks in the baseline
+    matrices: {'z': (rows, cols), 'Y': (rows, cols)}.
+    """
+    positions = {}
+    rows = z.index.get_indexer(pd.MultiIndex.from_frame(shock['z'][Z_KEYS[:3]]))
+    cols = z.columns.get_indexer(pd.MultiIndex.from_frame(shock['z'][Z_KEYS[3:]]))
+    if (rows < 0).any() or (cols < 0).any():
+        raise KeyError('Shock on z refers to labels that are not in the database')
+    positions['z'] = rows, cols
+
+    df = shock['Y']
+    rows = Y.index.get_indexer(pd.MultiIndex.from_frame(df[Y_KEYS[:3]]))
+    cols = Y.columns.get_indexer(pd.MultiIndex.from_arrays([
+        df['column region'], ['Consumption category'] * len(df), df['demand category']]))
+    if (rows < 0).any() or (cols < 0).any():
+        raise KeyError('Shock on Y refers to labels that are not in the database')
+    positions['Y'] = rows, cols
+    return positions
+
+
+def shock_delta(z, Y, X, shock):
+    """
+    Apply a shock (see read_shock) to the baseline z, Y and production X.
+
+    Returns the change in technical coefficients as a sparse n×n matrix dA
+    (so that the scenario z is z + dA) and the scenario final demand.
+    Only the coefficients listed in the shock are touched.
+    """
+    positions = shock_positions(z, Y, shock)
+    rows, cols = positions['z']
+    z_ = backend.values(z)  # Dense array or CSR matrix, both indexed by [i, j]
+    X_ = np.asarray(X, dtype=float).ravel()
+    new = {}
+    for i, j, kind, value in zip(rows, cols, shock['z']['type'], shock['z']['value']):
+        new[i, j] = _shocked(new.get((i, j), z_[i, j]), kind, value, X_[j])
+    ij = np.array(list(new), dtype=int).reshape(-1, 2)
+    dz = np.array([new[i, j] - z_[i, j] for i, j in new])
+    dA = sparse.coo_matrix((dz, (ij[:, 0], ij[:, 1])), shape=z.shape).tocsc()
+
+    Y_new = Y.copy()
+    rows, cols = positions['Y']
+    for i, j, kind, value in zip(rows, cols, shock['Y']['type'], shock['Y']['value']):
+        Y_new.iloc[i, j] = _shocked(Y_new.iloc[i, j], kind, value)
+    return dA, Y_new
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+
+Inverse-free Leontief solver.
+
+Footprints only need L @ y for a handful of final demand columns, so the
+Leontief inverse L = (I - A)^-1 never has to be materialized. (I - A) is
+factorized once per scenario (dense LU at aggregated size, sparse LU at
+full EXIOBASE detail) and every final demand column is one back-substitution.
+With a sparse A (see ts_analysis.backend), (I - A) is never densified and
+can also be solved iteratively: by the power series y + Ay + A²y + ... or
+by GMRES with an incomplete-LU preconditioner, both to a relative tolerance.
+Every method also solves the transposed system (I - A)^T, for adjoint
+calculations (multipliers m L, sensitivities) with the same factorization.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, sparse
+from scipy.sparse import linalg as splinalg
+
+from ts_analysis import backend
+
+METHODS = ['auto', 'dense', 'sparse', 'power', 'gmres']
+
+
+class LeontiefSolver:
+    """
+    Factorization of (I - A) for a technical coefficient matrix A (a dense
+    or sparse DataFrame, array or SciPy sparse matrix).
+
+    method: 'dense' (LAPACK LU), 'sparse' (SuperLU), 'power' (power series)
+    or 'gmres' (ILU-preconditioned GMRES), or 'auto', which picks the dense
+    LU up to `dense_limit` sectors and the sparse LU above it or whenever
+    A is sparse. tol and maxiter control the iterative methods.
+    """
+
+    def __init__(self, A, method='auto', dense_limit=2000, tol=1e-10, maxiter=1000):
+        self.index = A.index if isinstance(A, pd.DataFrame) else None
+        n = A.shape[0]
+        if method == 'auto':
+            method = 'dense' if n <= dense_limit and not backend.is_sparse(A) else 'sparse'
+        if method not in METHODS[1:]:
+            raise ValueError(f"Unknown method '{method}'")
+        self.method = method
+        self.n = n
+        self.tol = tol
+        self.maxiter = maxiter
+        self.iterations = 0  # Of the last iterative solve
+
+        if method == 'dense':
+            A_ = backend.values(A)
+            A_ = A_.toarray() if sparse.issparse(A_) else A_
+            I_A = np.eye(n) - A_
+            self._lu = linalg.lu_factor(I_A, overwrite_a=True, check_finite=False)
+            return
+        A_ = backend.to_sparse(A, 'csr')
+        if method == 'power':
+            self._A = A_
+            return
+        I_A = (sparse.identity(n, format='csc') - A_).tocsc()
+        if method == 'sparse':
+            self._lu = splinalg.splu(I_A)
+        else:
+            self._I_A = I_A
+            self._ilu = splinalg.spilu(I_A)
+
+    def _power(self, Y_, trans=False):
+        # x = y + Ay + A²y + ... until the last term is below tol * |x|
+        A = self._A.T if trans else self._A
+        x = Y_.copy()
+        term = Y_
+        for k in range(1, self.maxiter + 1):
+            term = A @ term
+            x += term
+            if np.abs(term).max() <= self.tol * np.abs(x).max():
+                self.iterations = k
+                return x
+        raise RuntimeError(f'Power series did not converge in {self.maxiter} terms')
+
+    def _gmres(self, Y_, trans=False):
+        columns = Y_.reshape(self.n, -1)
+        X = np.empty_like(columns)
+        I_A = self._I_A.T if trans else self._I_A
+        M = splinalg.LinearOperator(
+            (self.n, self.n), matvec=lambda x: self._ilu.solve(x, 'T' if trans else 'N'))
+        self.iterations = 0
+        for j in range(columns.shape[1]):
+            counter = []
+            X[:, j], info = splinalg.gmres(I_A, columns[:, j], M=M, rtol=self.tol,
+                                           atol=0, maxiter=self.maxiter,
+                                           callback=counter.append, callback_type='pr_norm')
+            if info:
+                raise RuntimeError(f'GMRES did not converge (info={info})')
+            self.iterations = max(self.iterations, len(counter))
+        return X.reshape(Y_.shape)
+
+    def solve(self, Y, trans=False):
+        """
+        Production x = (I - A)^-1 @ Y for one or several final demand
+        columns, or with trans=True the adjoint (I - A)^-T @ Y (e.g. the
+        multipliers L^T m of intensities m). DataFrames/Series come back
+        with the same labels.
+        """
+        Y_ = np.asarray(Y, dtype=float)
+        if not Y_.size:
+            X = np.zeros(Y_.shape)  # No column to solve (e.g. a rank-0 update)
+        elif self.method == 'dense':
+            X = linalg.lu_solve(self._lu, Y_, trans=int(trans), check_finite=False)
+        elif self.method == 'sparse':
+            X = self._lu.solve(Y_, trans='T' if trans else 'N')
+        elif self.method == 'power':
+            X = self._power(Y_, trans)
+        else:
+            X = self._gmres(Y_, trans)
+
+        if isinstance(Y, pd.DataFrame):
+            return pd.DataFrame(X, index=Y.index, columns=Y.columns)
+        if isinstance(Y, pd.Series):
+            return pd.Series(X, index=Y.index, name=Y.name)
+        return X
+
+
+def production(L, Y, trans=False):
+    # x = L @ Y (L^T @ Y with trans) from either a (dense or sparse) Leontief
+    # inverse or a solver object
+    if hasattr(L, 'solve'):
+        return L.solve(np.asarray(Y, dtype=float), trans=trans)
+    L_ = backend.values(L)
+    return (L_.T if trans else L_) @ np.asarray(Y, dtype=float)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+
+Columnar store of trade-off results.
+
+Results of the geographical, impact and sectoral analyses are written as
+partitioned Parquet datasets (one folder per table, hive-style
+dimension=/name=/scenario= partitions) in a long format shared by all
+dimensions:
+    - classification: Categories, Results, Magnitude (the ts_results table)
+    - rows: Region, Item, Indicator, value (per-row coordinates)
+    - totals: Region, Item, Indicator, value (totals of each analysis)
+
+Excel is a downstream export: to_excel rebuilds, from the store, the
+workbooks the original save_geo_res/save_imp_res/save_sec_res wrote (one
+name, name_all and name_sum sheet per analysis, e.g. geo_gwp_all). It does
+not rebuild the edited supplementary geo_results.xlsx (Cover sheet,
+'_aggregated' sheet names, '%' formulas). pyarrow is needed for the
+Parquet files.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TABLES = ['classification', 'rows', 'totals']
+COORDINATES = ['Region', 'Item', 'Indicator']
+
+# Row and column labels of the per-row and total results of each dimension
+LAYOUT = {
+    'geo': {'rows': (['Item'], 'Region'), 'totals': ['Region']},
+    'imp': {'rows': (['Region', 'Item'], 'Indicator'), 'totals': ['Indicator']},
+    'sec': {'rows': (['Region'], 'Item'), 'totals': ['Item']},
+}
+
+
+def _long(df, fixed):
+    # Wide results as (Region, Item, Indicator, value) rows, keeping the order
+    series = df.stack(future_stack=True) if isinstance(df, pd.DataFrame) else df
+    long = series.rename('value').reset_index()
+    long.columns = [c if c in COORDINATES + ['value'] else 'Indicator'
+                    for c in long.columns]
+    for coordinate, value in fixed.items():
+        if coordinate not in long:
+            long[coordinate] = value
+    long = long.reindex(columns=COORDINATES + ['value'])
+    long[COORDINATES] = long[COORDINATES].astype('string')  # Same schema in every partition
+    long['order'] = np.arange(len(long))
+    return long
+
+
+def _wide(long, index, columns=None):
+    long = long.sort_values('order').astype({c: object for c in COORDINATES})
+    if columns is None:
+        levels = index[0] if len(index) == 1 else index
+        series = long.set_index(levels)['value']
+        return series
+    df = long.set_index(index + [columns])['value'].unstack(columns)
+    rows = long.set_index(index).index.unique()
+    return df.reindex(index=rows, columns=long[columns].unique())
+
+
+class ResultStore:
+    """Partitioned Parquet dataset of trade-off results under `root`."""
+
+    def __init__(self, root='results'):
+        self.root = Path(root)
+
+    def _path(self, table, dimension, name, scenario):
+        return (self.root / table / f'dimension={dimension}' / f'name={name}'
+                / f'scenario={scenario}' / 'part-0.parquet')
+
+    def write(self, dimension, name, results, label, scenario='CE scenario'):
+        """
+        Store the (ts_results, data, total) tuple of one analysis.
+
+        dimension: 'geo', 'imp' or 'sec'
+        name: analysis name, e.g. 'geo_va' (the Excel sheet stem)
+        label: impact (geo, sec) or footprint region (imp) of the analysis
+        """
+        ts_results, data, total = results
+        fixed = {'Region': label} if dimension == 'imp' else {'Indicator': label}
+        tables = {
+            'classification': ts_results.assign(order=np.arange(len(ts_results))),
+            'rows': _long(data, fixed),
+            'totals': _long(total, fixed),
+        }
+        for table, df in tables.items():
+            path = self._path(table, dimension, name, scenario)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(path, index=False)
+
+    def read(self, table, dimension=None, name=None, scenario=None):
+        """
+        Read one table, optionally filtered on its partitions. The partition
+        keys come back as dimension, name and scenario columns.
+        """
+        filters = [(key, '==', value) for key, value in
+                   [('dimension', dimension), ('name', name), ('scenario', scenario)]
+                   if value is not None]
+        df = pd.read_parquet(self.root / table, filters=filters or None)
+        for key in ['dimension', 'name', 'scenario']:
+            df[key] = df[key].astype(str)
+        return df
+
+    def results(self, dimension, name, scenario='CE scenario'):
+        """Rebuild the (ts_results, data, total) tuple of one analysis."""
+        tables = {table: self.read(table, dimension, name, scenario) for table in TABLES}
+        ts_results = (tables['classification'].sort_values('order')
+                      [['Categories', 'Results', 'Magnitude']].reset_index(drop=True))
+
+        index, columns = LAYOUT[dimension]['rows']
+        data = _wide(tables['rows'], index, columns)
+        if dimension == 'imp':
+            data.columns.name = None
+        total = _wide(tables['totals'], LAYOUT[dimension]['totals'])
+        if dimension == 'imp':
+            total.index.name = None
+            total.name = None
+        else:
+            total.name = tables['totals']['Indicator'].iloc[0]
+        return ts_results, data, total
+
+    def to_excel(self, path, names, scenario='CE scenario'):
+        """
+        Write analyses ({name: dimension}) to one workbook with the sheets
+        of the save_*_res functions: name, name_all and name_sum.
+        """
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            for name, dimension in names.items():
+                ts_results, data, total = self.results(dimension, name, scenario)
+                ts_results.to_excel(writer, sheet_name=name)
+                data.to_excel(writer, sheet_name=name + '_all')
+                total.to_excel(writer, sheet_name=name + '_sum')
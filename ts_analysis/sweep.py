@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+
+Parallel scenario sweeps over shock parameters.
+
+A parameter grid (the Sensitivity rows of the shock workbook's main sheet,
+or {parameter: values} given in code, see shocks.parametrize) is expanded
+into variants that are evaluated in a process pool. The baseline (z, Y, X,
+the Leontief inverse w and the intensities M) is written once as .npy files
+and memory-mapped read-only by every worker, so it is shared through the
+page cache instead of being pickled per task. Each variant is a Woodbury
+update of the baseline, harmonized and classified; its summary is written
+as soon as it completes:
+
+    out/variant=<i>/part-0.parquet: parameters, analysis, Categories,
+                                    Results, Magnitude
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis import cache, footprints, shocks
+from ts_analysis.cube import ResultCube
+from ts_analysis.harmonize import INDICATORS, harmonize
+from ts_analysis.incremental import IncrementalSolver
+
+_WORKER = {}
+
+
+def parameter_grid(shock, grid=None):
+    """
+    Variants ([{parameter: value}]) of the cartesian product of `grid`
+    ({parameter: values}). Without a grid, every main sheet row with
+    Sensitivity 'Yes' ranges from Min to Max by Step.
+    """
+    if grid is None:
+        main = shock['main']
+        sensitive = main[main['Sensitivity'].astype(str).str.lower().isin(['yes', 'true', '1'])]
+        grid = {row['Legend']: np.arange(row['Min'], row['Max'] + row['Step'] / 2, row['Step'])
+                for _, row in sensitive.iterrows()}
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def share_baseline(z, Y, X, M, folder, w=None):
+    """
+    Write the baseline of a sweep to `folder` (memory-mappable .npy files).
+    w is the Leontief inverse, computed from z when not given.
+    """
+    if w is None:
+        from ts_analysis.solver import LeontiefSolver
+
+        w = LeontiefSolver(z).solve(pd.DataFrame(np.eye(len(z)), index=z.index,
+                                                 columns=z.columns))
+    cache.save_matrices({'z': z, 'Y': Y, 'X': X, 'w': w, 'M': M}, {}, folder)
+    return Path(folder)
+
+
+def _init(folder, shock, analyses, indicators, regions, scenario):
+    # Worker initializer: memory-map the baseline once per process
+    matrices, _ = cache.load_matrices(folder, mmap=True)
+    _WORKER.update(matrices=matrices, shock=shock, analyses=analyses,
+                   indicators=indicators, regions=regions, scenario=scenario)
+
+
+def evaluate(parameters, matrices, shock, analyses, indicators=INDICATORS,
+             regions=('EU', 'LAC'), scenario='CE scenario'):
+    """
+    Classification summary of one variant: one row per analysis and
+    category found (Categories, Results, Magnitude).
+    """
+    from ts_analysis.pipeline import classify
+
+    z, Y, X, w, M = (matrices[name] for name in ['z', 'Y', 'X', 'w', 'M'])
+    dA, Y_ce = shocks.shock_delta(z, Y, X, shocks.parametrize(shock, parameters))
+    L = {'baseline': w, scenario: IncrementalSolver(w, dA)}
+    fp = footprints.batched_footprints(M, L, {'baseline': Y, scenario: Y_ce}, list(regions))
+    norm_new = harmonize(fp, indicators, list(regions), scenario)
+
+    summary = []
+    for name, (_, (ts_results, _, _), _) in classify(
+            ResultCube.from_frame(norm_new, scenario), analyses).items():
+        summary.append(ts_results.assign(analysis=name))
+    summary = pd.concat(summary, ignore_index=True)
+    for parameter, value in parameters.items():
+        summary.insert(0, parameter, float(value))
+    return summary
+
+
+def _evaluate(variant, parameters):
+    w = _WORKER
+    return variant, evaluate(parameters, w['matrices'], w['shock'], w['analyses'],
+                             w['indicators'], w['regions'], w['scenario'])
+
+
+def run(baseline, shock, variants, analyses, out='results/sweep', indicators=INDICATORS,
+        regions=('EU', 'LAC'), scenario='CE scenario', processes=None):
+    """
+    Evaluate every variant (see parameter_grid) of `shock` against the
+    baseline folder written by share_baseline, in `processes` workers.
+    Summaries are written to `out` as they complete; returns the paths.
+    """
+    out = Path(out)
+    paths = []
+    initargs = (str(baseline), shock, analyses, indicators, list(regions), scenario)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init,
+                             initargs=initargs) as pool:
+        futures = [pool.submit(_evaluate, i, parameters) for i, parameters in enumerate(variants)]
+        for future in as_completed(futures):
+            variant, summary = future.result()
+            path = out / f'variant={variant:05d}' / 'part-0.parquet'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            summary.to_parquet(path, index=False)
+            paths.append(path)
+    return paths
+
+
+def read_sweep(out='results/sweep'):
+    """All variant summaries written by run, in variant order."""
+    df = pd.read_parquet(out)
+    df['variant'] = df['variant'].astype(int)
+    return df.sort_values('variant', kind='stable').reset_index(drop=True)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+
+Seeded synthetic multi-regional input-output tables and shock workbooks.
+
+Benchmarks and checks of the pipeline need a database without the
+EXIOBASE download. synthetic_mrio builds a balanced table with the labels
+of the aggregated database (Region, Level, Item rows; the EU, RoW and LAC
+regions and the ten aggregated sectors come first) at any size, e.g. 49
+regions × 163 (ixi) or 200 (pxp) sectors. Domestic blocks of A are denser
+than trade blocks, the columns of A sum to 0.3-0.7, and the factor of
+production (v) and satellite account (e) rows include the indicators of
+the framework next to other rows. synthetic_shock writes a MARIO shock
+workbook with the structure of MARIO_ce_scenario.xlsx for that table.
+
+The database only has the attributes the pipeline stages after aggregate
+use (z, Y, X, v, e, w, ...), so it is passed as their input:
+    Pipeline(shock=path).results['aggregate'] = synthetic_mrio(...)
+"""
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from ts_analysis.shocks import Y_KEYS, Z_KEYS
+
+REGIONS = ['EU', 'RoW', 'LAC']
+SECTORS = ['Manufacturing', 'Manufacturing - Food', 'Services', 'Construction',
+           'Waste treatment', 'Mining', 'P&N Fertilisers', 'Agriculture',
+           'Organic composting', 'Electricity']
+FACTORS = ['Value Added', 'Taxes less subsidies on products purchased']
+SATELLITES = ['Employment (people)', 'GHG emissions', 'Employment (hours)', 'Energy use',
+              'Domestic Extraction', 'Emissions']
+
+
+def _names(names, count, template):
+    return names[:count] + [template.format(i) for i in range(len(names) + 1, count + 1)]
+
+
+class SyntheticDatabase:
+    """
+    Baseline matrices of a synthetic table, named as in a MARIO Database:
+    coefficients (z, v, e), flows (Z, V, E), final demand (Y, EY),
+    production (X) and the Leontief inverse (w, computed when first used).
+    """
+
+    def __init__(self, z, Y, X, v, e, EY):
+        self.z, self.Y, self.X, self.v, self.e, self.EY = z, Y, X, v, e, EY
+
+    @property
+    def Z(self):
+        return self.z * self.X['production'].to_numpy()
+
+    @property
+    def V(self):
+        return self.v * self.X['production'].to_numpy()
+
+    @property
+    def E(self):
+        return self.e * self.X['production'].to_numpy()
+
+    @cached_property
+    def w(self):
+        from ts_analysis.solver import LeontiefSolver
+
+        return LeontiefSolver(self.z).solve(pd.DataFrame(
+            np.eye(len(self.z)), index=self.z.index, columns=self.z.columns))
+
+
+def synthetic_mrio(regions=49, sectors=163, domestic_density=0.6, trade_density=0.12,
+                   satellites=len(SATELLITES), seed=0):
+    """
+    Balanced synthetic table of `regions` × `sectors` sectors.
+
+    domestic_density, trade_density: share of nonzero coefficients in the
+    blocks of A within a region and between regions
+    satellites: rows of e (the SATELLITES first, then 'Stressor k')
+    """
+    rng = np.random.default_rng(seed)
+    region_names = _names(REGIONS, regions, 'R{:02d}')
+    sector_names = _names(SECTORS, sectors, 'Sector {:03d}')
+    index = pd.MultiIndex.from_product([region_names, ['Sector'], sector_names],
+                                       names=['Region', 'Level', 'Item'])
+    R, S, n = regions, sectors, len(index)
+    home = np.repeat(np.arange(R), S)
+
+    # Production and coefficients, one column block (region) at a time
+    X = rng.lognormal(8, 1.5, n)
+    A = np.empty((n, n))
+    for r in range(R):
+        columns = slice(r * S, (r + 1) * S)
+        domestic = home[:, None] == r
+        density = np.where(domestic, domestic_density, trade_density)
+        A[:, columns] = rng.random((n, S)) * (rng.random((n, S)) < density) * \
+            np.where(domestic, 1.0, 0.2)
+    A *= rng.uniform(0.3, 0.7, n) / np.maximum(A.sum(axis=0), 1e-12)
+
+    # Intermediate sales of at most 80% of production: final demand > 0
+    ratio = (A @ X) / X
+    A *= np.minimum(1, 0.8 / np.maximum(ratio, 1e-12))[:, None]
+    y = X - A @ X
+
+    # Final demand split over regions with a home bias
+    shares = rng.random((n, R))
+    shares[np.arange(n), home] += R
+    shares /= shares.sum(axis=1, keepdims=True)
+    demand = pd.MultiIndex.from_product([region_names, ['Consumption category'],
+                                         ['Final demand']], names=['Region', 'Level', 'Item'])
+    Y = pd.DataFrame(y[:, None] * shares, index=index, columns=demand)
+
+    # Value added rows share 1 - column sums of A
+    added = 1 - A.sum(axis=0)
+    split = rng.uniform(0.7, 0.95, n)
+    v = pd.DataFrame([added * split, added * (1 - split)], index=FACTORS, columns=index)
+
+    # Satellite intensities: a sector profile shared by all regions, with
+    # regional noise (e.g. agriculture is emission-intensive everywhere)
+    names = _names(SATELLITES, satellites, 'Stressor {}')
+    profile = rng.lognormal(0, 1, (len(names), S))
+    e = profile[:, np.tile(np.arange(S), R)] * rng.lognormal(0, 0.3, (len(names), n))
+    e *= rng.uniform(1e-4, 1e-2, (len(names), 1))
+    if 'Employment (hours)' in names and 'Employment (people)' in names:
+        e[names.index('Employment (hours)')] = e[names.index('Employment (people)')] * 1800
+    e = pd.DataFrame(e, index=names, columns=index)
+    EY = pd.DataFrame(np.outer(e.to_numpy().mean(axis=1), Y.sum(axis=0) * 0.01),
+                      index=e.index, columns=demand)
+
+    z = pd.DataFrame(A, index=index, columns=index, copy=False)
+    return SyntheticDatabase(z, Y, pd.DataFrame({'production': X}, index=index), v, e, EY)
+
+
+def synthetic_shock(database, path, region='LAC', target='EU', replaced='P&N Fertilisers',
+                    user='Agriculture', substitute='Organic composting',
+                    exported=('Agriculture', 'Manufacturing - Food'), cut=0.3):
+    """
+    Write a shock workbook like MARIO_ce_scenario.xlsx for a synthetic
+    table: in `region`, `user` buys `cut` less of `replaced` from every
+    region and the same value of `substitute` instead, final demand of
+    `region` shifts the same way, and `target` buys `cut` more of the
+    `exported` sectors of `region`.
+    """
+    z, Y = database.z, database.Y
+    X = database.X['production']
+    regions = list(z.index.unique(level='Region'))
+    Z = z.loc[:, (region, 'Sector', user)] * X[region, 'Sector', user]
+
+    rows = []
+    for supplier in regions:
+        rows.append([supplier, 'Sector', replaced, region, 'Sector', user,
+                     'Percentage', -cut])
+        rows.append([supplier, 'Sector', substitute, region, 'Sector', user,
+                     'Absolute', cut * Z[supplier, 'Sector', replaced]])
+    z_sheet = pd.DataFrame(rows, columns=Z_KEYS + ['type', 'value'])
+
+    rows = []
+    y = Y.loc[:, (region, 'Consumption category', 'Final demand')]
+    for supplier in regions:
+        rows.append([supplier, 'Sector', replaced, region, 'Final demand', 'Percentage', -cut])
+        rows.append([supplier, 'Sector', substitute, region, 'Final demand', 'Absolute',
+                     cut * y[supplier, 'Sector', replaced]])
+    for sector in exported:
+        rows.append([region, 'Sector', sector, target, 'Final demand', 'Percentage', cut])
+    Y_sheet = pd.DataFrame(rows, columns=Y_KEYS + ['type', 'value'])
+
+    main = pd.DataFrame(columns=['Legend', 'Description', 'Value', 'Unit of measure',
+                                 'Sensitivity', 'Min', 'Max', 'Step', 'Affected Parameter',
+                                 'Notes', 'References'])
+    with pd.ExcelWriter(path) as writer:
+        main.to_excel(writer, sheet_name='main', index=False)
+        z_sheet.to_excel(writer, sheet_name='z', index=False)
+        Y_sheet.to_excel(writer, sheet_name='Y', index=False)
+    return path